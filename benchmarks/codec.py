@@ -0,0 +1,75 @@
+"""
+Time stream frame decoding with each installed JSON codec.
+
+    python benchmarks/codec.py                  # synthetic QUOTE frames
+    python benchmarks/codec.py frames.jsonl     # one recorded frame per line
+    python benchmarks/codec.py tda-stream/      # a TDAStreamRecorder log
+"""
+
+import random
+import sys
+import time
+import os
+
+# runnable from a checkout without installing the package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pymeritrade.codec import CODECS, get_codec
+from pymeritrade.errors import TDAUsageError
+from pymeritrade.stream.record import FRAME_EXT, read_frames
+
+
+def synthetic_frames(count=2000, symbols=50):
+    codec = get_codec("json")
+    frames = []
+    for i in range(count):
+        content = []
+        for sym_idx in random.sample(range(500), symbols):
+            item = {"key": "SYM" + str(sym_idx), "delayed": False, "assetMainType": "EQUITY", "cusip": "000000000"}
+            for field in range(1, 12):
+                item[str(field)] = round(random.uniform(1, 500), 2)
+            content.append(item)
+        frame = {"data": [{"service": "QUOTE", "timestamp": 1600000000000 + i, "command": "SUBS", "content": content}]}
+        frames.append(codec.dumps(frame).encode("utf-8"))
+    return frames
+
+
+def load_frames(path):
+    if os.path.isdir(path) or path.endswith(FRAME_EXT):
+        return [payload for _, payload in read_frames(path)]
+    with open(path, "rb") as frames_f:
+        return [line.rstrip(b"\n") for line in frames_f if line.strip()]
+
+
+def bench(codec, frames, rounds=5):
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for frame in frames:
+            codec.loads(frame)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    frames = load_frames(sys.argv[1]) if len(sys.argv) > 1 else synthetic_frames()
+    size = sum(len(frame) for frame in frames)
+    print("{} frames, {:.1f} MB".format(len(frames), size / 1e6))
+    baseline = None
+    for name in reversed(list(CODECS)):
+        try:
+            codec = get_codec(name)
+        except TDAUsageError:
+            print("{:8} not installed".format(name))
+            continue
+        elapsed = bench(codec, frames)
+        baseline = baseline or elapsed
+        print(
+            "{:8} {:8.1f} ms  {:8.1f} MB/s  {:5.2f}x".format(
+                name, elapsed * 1000, size / elapsed / 1e6, baseline / elapsed
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
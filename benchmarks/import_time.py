@@ -0,0 +1,70 @@
+"""
+Measure how long `import pymeritrade` takes in a fresh interpreter and check it stays within budget.
+
+    python benchmarks/import_time.py                  # median of 10 cold imports, 250ms budget
+    python benchmarks/import_time.py --budget 150 --module "from pymeritrade import TDAClient"
+
+Also fails if an optional heavy dependency (pandas, numpy, selenium, ...) is imported eagerly.
+"""
+
+import subprocess
+import argparse
+import statistics
+import json
+import sys
+import os
+
+# the probes import the checkout, wherever this is run from
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ["pandas", "numpy", "selenium", "aiohttp", "websockets", "websocket", "asyncio", "pyarrow", "scipy"]
+
+PROBE = """
+import time, sys, json
+start = time.perf_counter()
+{stmt}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1000, "modules": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(stmt, runs):
+    probe = PROBE.format(stmt=stmt, heavy=HEAVY_MODULES)
+    results = [json.loads(subprocess.check_output([sys.executable, "-c", probe], cwd=ROOT)) for _ in range(runs)]
+    return statistics.median(result["ms"] for result in results), results[-1]["modules"]
+
+
+def top_imports(stmt, count):
+    # -X importtime writes "self us | cumulative us | module" lines to stderr
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", stmt], capture_output=True, text=True, cwd=ROOT)
+    rows = []
+    for line in proc.stderr.splitlines()[1:]:
+        _, self_us, cumulative_us, name = [part.strip() for part in line.replace(":", "|", 1).split("|")]
+        rows.append((int(cumulative_us), name))
+    return sorted(rows, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="import pymeritrade", help="import statement to time")
+    parser.add_argument("--budget", type=float, default=250.0, help="median import time budget in ms")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=10, help="show the slowest imports")
+    args = parser.parse_args()
+
+    median_ms, heavy = measure(args.module, args.runs)
+    print("{}: {:.1f} ms median over {} runs (budget {:.0f} ms)".format(args.module, median_ms, args.runs, args.budget))
+    for cumulative_us, name in top_imports(args.module, args.top):
+        print("  {:8.1f} ms  {}".format(cumulative_us / 1000, name))
+    failed = False
+    if heavy:
+        print("eagerly imported: " + ", ".join(heavy))
+        failed = True
+    if median_ms > args.budget:
+        print("over budget by {:.1f} ms".format(median_ms - args.budget))
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,428 @@
+"""
+A local stand-in for the TDA REST API and streamer, serving synthetic (or recorded) payloads.
+
+    server = TDAMockServer(option_strikes=40).start()
+    tda = server.client()
+    print(tda.quotes()[['AAPL', 'MSFT']])
+    stream = tda.create_stream()
+    server.stop()
+
+REST replies can be replaced per path with `payloads={"marketdata/chains": {...}}`, and the streamer
+can replay the data frames of a TDAStreamRecorder log with `frames="tda-stream/"`.
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import threading
+import asyncio
+import random
+import json
+import time
+import sys
+import os
+
+# runnable from a checkout without installing the package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pymeritrade import TDAClient
+from pymeritrade.stream.record import read_frames
+
+MS_PER_DAY = 24 * 60 * 60 * 1000
+SPAN_BARS = {"day": 10, "month": 31, "year": 366}
+START_MS = 1600000000000
+
+
+def _price(symbol):
+    return 20 + sum(map(ord, symbol)) % 480
+
+
+def synthetic_candles(symbol, start_ms, end_ms, step_ms, limit=50000):
+    rand = random.Random(symbol)
+    price = _price(symbol)
+    candles = []
+    for ts in range(start_ms - start_ms % step_ms, end_ms + 1, step_ms)[-limit:]:
+        move = rand.uniform(-0.01, 0.01) * price
+        candles.append(
+            {
+                "open": round(price, 2),
+                "high": round(price + abs(move), 2),
+                "low": round(price - abs(move), 2),
+                "close": round(price + move, 2),
+                "volume": rand.randint(1000, 100000),
+                "datetime": ts,
+            }
+        )
+        price += move
+    return candles
+
+
+def synthetic_quote(symbol):
+    price = _price(symbol)
+    return {
+        "assetType": "EQUITY",
+        "assetMainType": "EQUITY",
+        "cusip": "000000000",
+        "symbol": symbol,
+        "description": symbol + " Inc",
+        "bidPrice": price - 0.01,
+        "bidSize": 100,
+        "askPrice": price + 0.01,
+        "askSize": 200,
+        "lastPrice": price,
+        "lastSize": 100,
+        "openPrice": price,
+        "highPrice": price + 1,
+        "lowPrice": price - 1,
+        "closePrice": price,
+        "netChange": 0.0,
+        "totalVolume": 1000000,
+        "quoteTimeInLong": START_MS,
+        "tradeTimeInLong": START_MS,
+        "mark": price,
+        "exchange": "q",
+        "exchangeName": "NASD",
+        "volatility": 0.3,
+        "peRatio": 20.0,
+        "divAmount": 0.0,
+        "divYield": 0.0,
+        "divDate": "2020-01-01 00:00:00.000",
+        "securityStatus": "Normal",
+        "delayed": False,
+    }
+
+
+def synthetic_instrument(symbol):
+    return {
+        "cusip": "000000000",
+        "symbol": symbol,
+        "description": symbol + " Inc - Common Stock",
+        "exchange": "NASDAQ",
+        "assetType": "EQUITY",
+    }
+
+
+def synthetic_contract(symbol, put_call, strike, exp_ms, days, underlying):
+    intrinsic = max(underlying - strike, 0) if put_call == "CALL" else max(strike - underlying, 0)
+    mark = round(intrinsic + 0.5 + days * 0.05, 2)
+    code = "{}_{}{}{}".format(symbol, time.strftime("%m%d%y", time.gmtime(exp_ms / 1000)), put_call[0], strike)
+    return {
+        "putCall": put_call,
+        "symbol": code,
+        "description": code,
+        "exchangeName": "OPR",
+        "bid": mark - 0.05,
+        "ask": mark + 0.05,
+        "last": mark,
+        "mark": mark,
+        "bidSize": 10,
+        "askSize": 10,
+        "lastSize": 1,
+        "highPrice": mark,
+        "lowPrice": mark,
+        "openPrice": 0.0,
+        "closePrice": mark,
+        "totalVolume": 100,
+        "tradeTimeInLong": START_MS,
+        "quoteTimeInLong": START_MS,
+        "netChange": 0.0,
+        "volatility": 30.0,
+        "delta": 0.5 if put_call == "CALL" else -0.5,
+        "gamma": 0.05,
+        "theta": -0.05,
+        "vega": 0.1,
+        "rho": 0.01,
+        "openInterest": 500,
+        "timeValue": mark - intrinsic,
+        "theoreticalOptionValue": mark,
+        "theoreticalVolatility": 29.0,
+        "strikePrice": float(strike),
+        "expirationDate": exp_ms,
+        "daysToExpiration": days,
+        "expirationType": "R",
+        "lastTradingDay": exp_ms,
+        "multiplier": 100.0,
+        "percentChange": 0.0,
+        "markChange": 0.0,
+        "markPercentChange": 0.0,
+        "inTheMoney": intrinsic > 0,
+        "nonStandard": False,
+        "mini": False,
+    }
+
+
+def synthetic_chain(symbol, strikes=20, expirations=4):
+    underlying = _price(symbol)
+    chain = {
+        "symbol": symbol,
+        "status": "SUCCESS",
+        "strategy": "SINGLE",
+        "interestRate": 0.1,
+        "volatility": 29.0,
+        "underlyingPrice": underlying,
+        "numberOfContracts": 2 * strikes * expirations,
+    }
+    for key, put_call in [("callExpDateMap", "CALL"), ("putExpDateMap", "PUT")]:
+        exp_map = {}
+        for exp_idx in range(expirations):
+            days = 7 * (exp_idx + 1)
+            exp_ms = START_MS + days * MS_PER_DAY
+            exp_key = time.strftime("%Y-%m-%d", time.gmtime(exp_ms / 1000)) + ":" + str(days)
+            exp_map[exp_key] = {
+                str(float(strike)): [synthetic_contract(symbol, put_call, strike, exp_ms, days, underlying)]
+                for strike in range(underlying - strikes // 2, underlying - strikes // 2 + strikes)
+            }
+        chain[key] = exp_map
+    return chain
+
+
+def synthetic_stream_item(service, symbol, seq, ts=START_MS):
+    price = _price(symbol) + (seq % 100) / 100
+    if service.startswith("CHART"):
+        values = [symbol, price, price + 0.1, price - 0.1, price, 1000.0 + seq, seq, START_MS + seq * 60000, 18000]
+        return dict({"key": symbol, "seq": seq}, **{str(field): value for field, value in enumerate(values)})
+    item = {"key": symbol, "delayed": False, "assetMainType": "EQUITY", "cusip": "000000000", "seq": seq}
+    # LEVELONE_EQUITIES field numbers: bid, ask, last, bid/ask size, cumulative volume, last size, quote/trade time
+    fields = {1: price - 0.01, 2: price + 0.01, 3: price, 4: 1, 5: 2, 8: 1000.0 + 100 * seq, 9: 100, 50: ts, 51: ts}
+    item.update({str(field): value for field, value in fields.items()})
+    return item
+
+
+class _RESTHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # headers and body go out in separate writes; without this, delayed ACKs add ~40ms per keep-alive request
+    disable_nagle_algorithm = True
+
+    def _reply(self, body, status=200):
+        content = body if type(body) == bytes else json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _route(self, method):
+        url = urlparse(self.path)
+        path = url.path[len("/v1/") :]
+        params = {key: vals[0] for key, vals in parse_qs(url.query).items()}
+        if method == "POST":
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        mock = self.server.mock
+        mock.requests += 1
+        if mock.latency:
+            time.sleep(mock.latency)
+        if path in mock.payloads:
+            return self._reply(mock.payloads[path])
+        body = mock.respond(method, path, params)
+        if body is None:
+            return self._reply({"error": "Not Found"}, status=404)
+        self._reply(body)
+
+    def do_GET(self):
+        self._route("GET")
+
+    def do_POST(self):
+        self._route("POST")
+
+    def do_DELETE(self):
+        self._route("DELETE")
+
+    def log_message(self, *args):
+        pass
+
+
+class TDAMockServer:
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=0,
+        ws_port=0,
+        payloads=None,
+        frames=None,
+        stream_frames=100,
+        option_strikes=20,
+        option_expirations=4,
+        latency=0.0,
+    ):
+        self.host = host
+        self.port = port
+        self.ws_port = ws_port
+        self.payloads = payloads or {}
+        self.frames = frames
+        self.stream_frames = stream_frames
+        self.option_strikes = option_strikes
+        self.option_expirations = option_expirations
+        self.latency = latency
+        self.requests = 0
+        self.http = None
+        self.loop = None
+        self.ws_server = None
+
+    @property
+    def api_url(self):
+        return "http://{}:{}/v1/".format(self.host, self.port)
+
+    def principles(self):
+        return {
+            "userId": "mock",
+            "streamerInfo": {
+                "streamerSocketUrl": "ws://{}:{}".format(self.host, self.ws_port),
+                "token": "mock-token",
+                "tokenTimestamp": "2020-09-13T12:00:00+0000",
+                "userGroup": "ACCT",
+                "accessLevel": "ACCT",
+                "acl": "QSQTRF",
+                "appId": "mock",
+            },
+            "accounts": [
+                {"accountId": "1", "company": "AMER", "segment": "AMER", "accountCdDomainId": "A000000000000000"}
+            ],
+        }
+
+    def account(self):
+        return {
+            "securitiesAccount": {
+                "type": "MARGIN",
+                "accountId": "1",
+                "roundTrips": 0,
+                "isDayTrader": False,
+                "currentBalances": {"equity": 100000.0, "buyingPower": 200000.0, "liquidationValue": 100000.0},
+                "positions": [
+                    {
+                        "longQuantity": 10.0,
+                        "shortQuantity": 0.0,
+                        "averagePrice": _price(symbol),
+                        "marketValue": 10.0 * _price(symbol),
+                        "instrument": {"assetType": "EQUITY", "cusip": "000000000", "symbol": symbol},
+                    }
+                    for symbol in ["AAPL", "MSFT", "INTC"]
+                ],
+                "orderStrategies": [],
+            }
+        }
+
+    def respond(self, method, path, params):
+        parts = path.split("/")
+        if path == "oauth2/token":
+            return {"access_token": "mock-access", "refresh_token": "mock-refresh", "expires_in": 1800}
+        if path == "userprincipals":
+            return self.principles()
+        if path == "accounts":
+            return [self.account()]
+        if parts[0] == "accounts":
+            return {} if method != "GET" or "orders" in parts else self.account()
+        if path == "marketdata/quotes":
+            return {symbol: synthetic_quote(symbol) for symbol in params["symbol"].split(",")}
+        if path == "marketdata/chains":
+            return synthetic_chain(params["symbol"], self.option_strikes, self.option_expirations)
+        if path == "instruments":
+            symbols = params["symbol"].split(",")
+            if params.get("projection") == "fundamental":
+                return {
+                    symbol: dict(synthetic_instrument(symbol), fundamental={"symbol": symbol, "peRatio": 20.0})
+                    for symbol in symbols
+                }
+            return {symbol: synthetic_instrument(symbol) for symbol in symbols}
+        if len(parts) == 3 and parts[2] == "pricehistory":
+            step = 60000 if params.get("frequencyType") == "minute" else MS_PER_DAY
+            end = int(params.get("endDate", START_MS))
+            start = int(params.get("startDate", end - SPAN_BARS.get(params.get("periodType"), 366) * MS_PER_DAY))
+            return {"symbol": parts[1], "empty": False, "candles": synthetic_candles(parts[1], start, end, step)}
+        if len(parts) == 3 and parts[2] == "movers":
+            return []
+        return None
+
+    def _stream_data(self, service, keys):
+        if self.frames is not None:
+            # recorded sessions are replayed as captured, regardless of what was subscribed
+            for _, payload in read_frames(self.frames):
+                if b'"data"' in payload:
+                    yield payload.decode("utf-8")
+            return
+        for seq in range(self.stream_frames):
+            now_ms = int(time.time() * 1000)
+            content = [synthetic_stream_item(service, key, seq, now_ms) for key in keys]
+            yield json.dumps(
+                {
+                    "data": [
+                        {
+                            "service": service,
+                            "timestamp": now_ms,
+                            "command": "SUBS",
+                            "content": content,
+                        }
+                    ]
+                }
+            )
+
+    async def _ws_handler(self, ws, *args):
+        async for msg in ws:
+            for req in json.loads(msg)["requests"]:
+                resp = {
+                    "service": req["service"],
+                    "requestid": req["requestid"],
+                    "command": req["command"],
+                    "timestamp": int(time.time() * 1000),
+                    "content": {"code": 0, "msg": "mock"},
+                }
+                await ws.send(json.dumps({"response": [resp]}))
+                if req["command"] == "SUBS" and req["service"] != "ADMIN":
+                    keys = req["parameters"]["keys"].split(",")
+                    for frame in self._stream_data(req["service"], keys):
+                        await ws.send(frame)
+
+    def _serve_ws(self, started):
+        import websockets
+
+        async def serve():
+            self.ws_server = await websockets.serve(self._ws_handler, self.host, self.ws_port, max_size=None)
+            self.ws_port = list(self.ws_server.sockets)[0].getsockname()[1]
+            started.set()
+            await self.ws_server.wait_closed()
+
+        self.loop = asyncio.new_event_loop()
+        self.loop.run_until_complete(serve())
+
+    def start(self):
+        self.http = ThreadingHTTPServer((self.host, self.port), _RESTHandler)
+        self.http.daemon_threads = True
+        self.http.mock = self
+        self.port = self.http.server_port
+        threading.Thread(target=self.http.serve_forever, daemon=True).start()
+        try:
+            import websockets  # noqa: F401
+        except ImportError:
+            return self
+        started = threading.Event()
+        threading.Thread(target=self._serve_ws, args=(started,), daemon=True).start()
+        started.wait(5)
+        return self
+
+    def client(self, **kwargs):
+        kwargs.setdefault("rate_limit", None)
+        tda = TDAClient("MOCK", api_url=self.api_url, **kwargs)
+        tda.access_token = "mock-access"
+        tda.account_id = "1"
+        return tda
+
+    def stop(self):
+        if self.http is not None:
+            self.http.shutdown()
+            self.http.server_close()
+        if self.ws_server is not None:
+            self.loop.call_soon_threadsafe(self.ws_server.close)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+if __name__ == "__main__":
+    with TDAMockServer(port=int(sys.argv[1]) if len(sys.argv) > 1 else 8080) as server:
+        print("REST at", server.api_url, "streamer at ws://{}:{}".format(server.host, server.ws_port))
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,203 @@
+"""
+End-to-end benchmarks of the client hot paths against the local mock server.
+
+    python benchmarks/suite.py                          # all cases at the default universe sizes
+    python benchmarks/suite.py --cases quotes options --sizes 10 100
+    python benchmarks/suite.py --save baseline.json     # store a run
+    python benchmarks/suite.py --baseline baseline.json # compare against it (exit code 1 on regressions)
+    python benchmarks/suite.py --frames tda-stream/     # decode a recorded session instead of synthetic frames
+
+Each case reports per-run latency percentiles, throughput (items per second) and peak traced memory.
+"""
+
+import tracemalloc
+import argparse
+import platform
+import json
+import time
+import sys
+import os
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# runnable from a checkout without installing the package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_server import TDAMockServer, START_MS
+from pymeritrade.stream.record import read_frames
+from pymeritrade.stream.stream import StreamData, TDAStream
+
+DEFAULT_SIZES = {
+    "call_api": [1],
+    "quotes": [10, 100, 1000],
+    "history": [10, 50, 200],
+    "options": [1, 10, 50],
+    "stream_decode": [10, 100, 500],
+    "stream": [10, 100],
+}
+
+
+def _symbols(count):
+    return ["S{:04d}".format(i) for i in range(count)]
+
+
+def case_call_api(server, tda, size):
+    def run():
+        for _ in range(100):
+            tda._call_api("marketdata/quotes", params={"symbol": "AAPL"})
+
+    return run, 100
+
+
+def case_quotes(server, tda, size):
+    symbols = _symbols(size)
+    return lambda: tda.quotes()[symbols], size
+
+
+def case_history(server, tda, size):
+    symbols = _symbols(size)
+    return lambda: tda.history(span="year", freq="daily", end=START_MS)[symbols], size
+
+
+def case_options(server, tda, size):
+    symbols = _symbols(size)
+    return lambda: tda.options()[symbols if size > 1 else symbols[0]], size
+
+
+def _frames(server, size, count=200):
+    if server.frames is not None:
+        return [payload for _, payload in read_frames(server.frames)]
+    return list(server._stream_data("QUOTE", _symbols(size)))[:count]
+
+
+def case_stream_decode(server, tda, size):
+    frames = _frames(server, size)
+
+    def run():
+        # the websocket dispatch path (codec, routing, queues) plus reading every decoded item
+        stream = TDAStream(None, reconnect=False, overflow="block", queue_size=0)
+        data_q = stream._make_queue("*")
+        for frame in frames:
+            stream._on_ws_msg(frame)
+        while len(data_q) > 0:
+            type_name, items, timestamp = data_q.get(timeout=0)
+            StreamData(type_name, items, timestamp).data
+
+    return run, len(frames)
+
+
+def case_stream(server, tda, size):
+    symbols = _symbols(size)
+    count = sum(1 for _ in server._stream_data("QUOTE", symbols))
+
+    def run():
+        stream = tda.create_stream(reconnect=False, overflow="block", queue_size=0)
+        stream.start(timeout=10)
+        data_iter = stream.subscribe("quote", symbols=symbols)()
+        for _ in range(count):
+            next(data_iter).data
+        stream.close()
+
+    return run, count
+
+
+CASES = {
+    "call_api": case_call_api,
+    "quotes": case_quotes,
+    "history": case_history,
+    "options": case_options,
+    "stream_decode": case_stream_decode,
+    "stream": case_stream,
+}
+
+
+def measure(run, items, repeat):
+    run()
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        latencies.append(time.perf_counter() - start)
+    # memory is traced in a separate pass so tracing overhead doesn't skew the timings
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    latencies = np.array(latencies) * 1000
+    return {
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p90_ms": float(np.percentile(latencies, 90)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "mean_ms": float(latencies.mean()),
+        "throughput": float(items * len(latencies) / latencies.sum() * 1000),
+        "peak_mb": peak / 1e6,
+    }
+
+
+def compare(results, baseline, threshold):
+    base = {(result["case"], result["size"]): result for result in baseline["results"]}
+    regressions = []
+    print("\n{:14} {:>6} {:>10} {:>12} {:>10}".format("vs baseline", "size", "p50", "throughput", "peak mem"))
+    for result in results:
+        prev = base.get((result["case"], result["size"]))
+        if prev is None:
+            continue
+        changes = {
+            "p50": result["p50_ms"] / prev["p50_ms"] - 1,
+            "throughput": result["throughput"] / prev["throughput"] - 1,
+            "peak": result["peak_mb"] / prev["peak_mb"] - 1 if prev["peak_mb"] else 0.0,
+        }
+        print(
+            "{:14} {:>6} {:>+9.1%} {:>+11.1%} {:>+9.1%}".format(
+                result["case"], result["size"], changes["p50"], changes["throughput"], changes["peak"]
+            )
+        )
+        # sub-megabyte peaks are too noisy to compare relatively
+        grew = changes["peak"] > threshold and result["peak_mb"] - prev["peak_mb"] > 0.5
+        if changes["p50"] > threshold or changes["throughput"] < -threshold or grew:
+            regressions.append((result["case"], result["size"], changes))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--sizes", nargs="+", type=int, help="universe sizes (default: per case)")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--frames", help="TDAStreamRecorder log to serve/decode instead of synthetic frames")
+    parser.add_argument("--save", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare against results saved with --save")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative change counted as a regression")
+    args = parser.parse_args()
+
+    results = []
+    with TDAMockServer(frames=args.frames) as server:
+        tda = server.client()
+        header = ["case", "size", "p50 ms", "p90 ms", "p99 ms", "items/s", "peak MB"]
+        print("{:14} {:>6} {:>10} {:>10} {:>10} {:>12} {:>10}".format(*header))
+        for name in args.cases:
+            for size in args.sizes or DEFAULT_SIZES[name]:
+                run, items = CASES[name](server, tda, size)
+                result = dict({"case": name, "size": size}, **measure(run, items, args.repeat))
+                results.append(result)
+                print(
+                    "{case:14} {size:>6} {p50_ms:>10.2f} {p90_ms:>10.2f} {p99_ms:>10.2f} "
+                    "{throughput:>12.0f} {peak_mb:>10.2f}".format(**result)
+                )
+
+    if args.save:
+        meta = {"python": platform.python_version(), "machine": platform.machine(), "time": time.time()}
+        with open(args.save, "w") as save_f:
+            json.dump({"meta": meta, "results": results}, save_f, indent=2)
+    if args.baseline:
+        with open(args.baseline, "r") as base_f:
+            regressions = compare(results, json.load(base_f), args.threshold)
+        for case, size, changes in regressions:
+            print("REGRESSION {} size={}: {}".format(case, size, {key: round(val, 3) for key, val in changes.items()}))
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
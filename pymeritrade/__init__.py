@@ -1 +1,10 @@
-from pymeritrade.client import TDAClient
\ No newline at end of file
+from pymeritrade.client import TDAClient
+
+
+def __getattr__(name):
+    # the asyncio client (and asyncio itself) is only imported when asked for
+    if name == "AsyncTDAClient":
+        from pymeritrade.aio import AsyncTDAClient
+
+        return AsyncTDAClient
+    raise AttributeError("module 'pymeritrade' has no attribute " + repr(name))
@@ -0,0 +1,41 @@
+import time
+
+from pymeritrade.orders import TDAOrder
+from pymeritrade.utils import clean_col_names, pd
+
+
+class TDAAccountSnapshot:
+    def __init__(self, client, json_data):
+        self.client = client
+        self.json = json_data
+        self.fetched_at = time.time()
+        self.id = self.json["accountId"]
+        self.balances = self.json.get("currentBalances", {})
+        self.equity = self.balances.get("equity")
+        self.buying_power = self.balances.get("buyingPower")
+        self.liquidation_value = self.balances.get("liquidationValue")
+        self.day_trades = self.json.get("roundTrips")
+
+    @staticmethod
+    def from_json(client, json_data):
+        return TDAAccountSnapshot(client, json_data)
+
+    @property
+    def age(self):
+        return time.time() - self.fetched_at
+
+    @property
+    def positions(self):
+        df = pd.json_normalize(self.json.get("positions", []))
+        df = df.rename(columns={col: col.replace("instrument.", "") for col in df.columns})
+        df = clean_col_names(df)
+        if "symbol" in df.columns:
+            df = df.set_index("symbol")
+        return df
+
+    @property
+    def orders(self):
+        return [TDAOrder.from_json(self.client, data) for data in self.json.get("orderStrategies", [])]
+
+    def __repr__(self):
+        return f"<AccountSnapshot ({self.id}) equity={self.equity}>"
@@ -0,0 +1,300 @@
+import asyncio
+import time
+
+from pymeritrade.history import TDAHistory
+from pymeritrade.options import TDAOptions, _empty_chain
+from pymeritrade.quotes import TDAQuotes
+from pymeritrade.instruments import TDAInstrument, TDAInstruments
+from pymeritrade.errors import TDAAPIError, TDAUsageError
+from pymeritrade.utils import batch_symbols, pd
+from pymeritrade.ratelimit import PRIORITY_BULK, PRIORITY_DEFAULT, PRIORITY_QUOTE
+
+
+class AsyncTDAHistory(TDAHistory):
+    def __getitem__(self, key):
+        return self._async_getitem(key)
+
+    async def _fetch_range_async(self, symbol, start, end):
+        resp = await self.client._call_api(
+            "marketdata/{}/pricehistory".format(symbol), params=self._history_params(start, end), priority=PRIORITY_BULK
+        )
+        return self._parse_candles(resp)
+
+    async def _fetch_candles_async(self, symbol, start=None, end=None):
+        start = start if start is not None else self.start
+        end = end if end is not None else self.end
+        chunks = self._chunk_range(start, end)
+        parts = await asyncio.gather(*[self._fetch_range_async(symbol, *chunk) for chunk in chunks])
+        return parts[0] if len(parts) == 1 else self._stitch_candles(parts)
+
+    async def _query_history_async(self, symbol):
+        # same chunking and candle store as TDAHistory, so both clients return the same bars
+        if self.store is None:
+            df = await self._fetch_candles_async(symbol)
+        else:
+            loop = asyncio.get_event_loop()
+            # store reads and writes are file I/O, kept off the event loop
+            plan = await loop.run_in_executor(None, self._store_plan, symbol)
+            parts = [await self._fetch_candles_async(symbol, *span) for span in plan[-1]]
+            df = await loop.run_in_executor(None, self._store_merge, symbol, plan, parts)
+        return self._format_candles(df)
+
+    async def _async_getitem(self, key):
+        if type(key) == str:
+            return await self._query_history_async(key)
+        dfs = await asyncio.gather(*[self._query_history_async(symbol) for symbol in key])
+        return self._join_history(key, dfs)
+
+
+class AsyncTDAOptions(TDAOptions):
+    def __getitem__(self, key):
+        if type(key) == str:
+            return self._query_options_async(key)
+        return self._query_many_async(list(key))
+
+    async def _query_many_async(self, symbols):
+        if len(symbols) == 0:
+            return _empty_chain()
+        chains = await asyncio.gather(*[self._query_options_async(symbol) for symbol in symbols])
+        return pd.concat(chains)
+
+    async def _query_options_async(self, symbol):
+        resp = await self.client._call_api("marketdata/chains", params=self._options_params(symbol))
+        return self._parse_options(symbol, resp)
+
+
+class AsyncTDAQuotes(TDAQuotes):
+    def __getitem__(self, key):
+        return self._async_getitem(key)
+
+    async def _async_getitem(self, key):
+        if type(key) == str:
+            return (await self._query_quotes_async([key]))[key]
+        data = {}
+        batches = batch_symbols(list(key), self.batch_size)
+        for resp in await asyncio.gather(*[self._query_quotes_async(batch) for batch in batches]):
+            if "error" in resp:
+                raise TDAAPIError(resp["error"])
+            data.update(resp)
+        if self.raw:
+            return data
+        return self._quotes_frame(data)
+
+    async def _query_quotes_async(self, symbols):
+        return await self.client._call_api(
+            "marketdata/quotes", params=self._quotes_params(symbols), priority=PRIORITY_QUOTE
+        )
+
+
+class AsyncTDAInstruments(TDAInstruments):
+    def __getitem__(self, symbol):
+        return self._async_getitem(symbol)
+
+    async def _query_instruments_async(self, query, search):
+        return await self.client._call_api("instruments", params=self._instruments_params(query, search))
+
+    async def _fundamentals_batch_async(self, symbols):
+        data = await self._query_instruments_async(",".join(symbols), "fundamental")
+        if "error" in data:
+            raise TDAAPIError(data["error"])
+        return {symbol: item["fundamental"] for symbol, item in data.items() if "fundamental" in item}
+
+    async def fundamentals(self, query):
+        if type(query) == str:
+            return (await self._query_instruments_async(query, "fundamental"))[query]["fundamental"]
+        rows = {}
+        batches = batch_symbols(list(query))
+        for batch in await asyncio.gather(*[self._fundamentals_batch_async(batch) for batch in batches]):
+            rows.update(batch)
+        return self._fundamentals_frame(rows)
+
+    async def _search_batch_async(self, symbols):
+        data = await self._query_instruments_async(",".join(symbols), "symbol-search")
+        if "error" in data:
+            raise TDAAPIError(data["error"])
+        return data
+
+    async def _lookup_async(self, symbols):
+        found = {}
+        missing = []
+        for symbol in symbols:
+            data = TDAInstruments.CACHE.get(symbol)
+            if data is None:
+                missing.append(symbol)
+            else:
+                found[symbol] = data
+        batches = batch_symbols(list(dict.fromkeys(missing)))
+        for data in await asyncio.gather(*[self._search_batch_async(batch) for batch in batches]):
+            for symbol, item in data.items():
+                TDAInstruments.CACHE.set(symbol, item)
+                found[symbol] = item
+        for symbol in symbols:
+            if symbol not in found:
+                raise TDAAPIError(f"{symbol} not found.")
+        # instruments stay bound to the blocking client so their helpers keep working
+        return [TDAInstrument.from_json(self.client.client, found[symbol]) for symbol in symbols]
+
+    async def _async_getitem(self, key):
+        if type(key) == str:
+            return (await self._lookup_async([key]))[0]
+        return await self._lookup_async(list(key))
+
+
+class AsyncTDAClient:
+    def __init__(self, client, max_connections=100, timeout=30):
+        self.client = client
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.codec = client.codec
+        self.metrics = client.metrics
+        self.session = None
+
+    async def _get_session(self):
+        if self.session is None:
+            try:
+                import aiohttp
+            except ImportError:
+                raise TDAUsageError("aiohttp is required for AsyncTDAClient (pip install aiohttp)")
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self.session
+
+    async def _call_api(self, path, params=None, method="GET", data=None, priority=PRIORITY_DEFAULT):
+        waited = 0.0
+        if self.client.rate_limiter is not None:
+            waited = await self.client.rate_limiter.acquire_async(priority)
+        session = await self._get_session()
+        kwargs = {}
+        kwargs["headers"] = {"Authorization": "Bearer " + self.client.access_token}
+        if params is not None:
+            kwargs["params"] = {key: str(val) for key, val in params.items()}
+        if data is not None:
+            kwargs["json"] = data
+        metrics = self.metrics
+        start = time.perf_counter()
+        try:
+            async with session.request(method, self.client.api_url + path, **kwargs) as resp:
+                content = await resp.read()
+        except Exception:
+            if metrics is not None:
+                metrics.record_request(method, path, None, time.perf_counter() - start, 0.0, 0, waited, error=True)
+            raise
+        if metrics is None:
+            return self._parse_content(content)
+        fetched = time.perf_counter()
+        result = self._parse_content(content)
+        error = resp.status >= 400 or (type(result) == dict and "error" in result)
+        metrics.record_request(
+            method, path, resp.status, fetched - start, time.perf_counter() - fetched, len(content), waited, error
+        )
+        return result
+
+    def _parse_content(self, content):
+        if not content:
+            return {}
+        try:
+            return self.codec.loads(content)
+        except ValueError:
+            return {"error": "parse error", "content": content.decode("utf-8", "replace")}
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self):
+        await self._get_session()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    @property
+    def account_id(self):
+        return self.client.account_id
+
+    async def _refresh_token(self):
+        # refreshed through the wrapped client, so both share the new access token
+        return await asyncio.get_event_loop().run_in_executor(None, self.client._refresh_token)
+
+    @property
+    def principles(self):
+        return self._call_api("userprincipals", params=dict(fields="streamerSubscriptionKeys,streamerConnectionInfo"))
+
+    @property
+    def accounts(self):
+        return self._call_api("accounts")
+
+    async def _account(self):
+        return (await self._call_api("accounts/{}".format(self.account_id)))["securitiesAccount"]
+
+    async def _balance(self, key):
+        return (await self._account())["currentBalances"][key]
+
+    async def _day_trades(self):
+        return (await self._account())["roundTrips"]
+
+    @property
+    def account(self):
+        return self._account()
+
+    @property
+    def equity(self):
+        return self._balance("equity")
+
+    @property
+    def day_trades(self):
+        return self._day_trades()
+
+    @property
+    def buying_power(self):
+        return self._balance("buyingPower")
+
+    @property
+    def liquidation_value(self):
+        return self._balance("liquidationValue")
+
+    @property
+    def instruments(self):
+        return AsyncTDAInstruments(self)
+
+    @property
+    def stocks(self):
+        return self.instruments
+
+    async def movers(self, index="$DJI", direction=None):
+        params = {}
+        if direction:
+            params["direction"] = direction.lower()
+        return await self._call_api("marketdata/{}/movers".format(index), params=params)
+
+    def stream(self, **kwargs):
+        from pymeritrade.stream.aio import AsyncTDAStream
+
+        return AsyncTDAStream(self, **kwargs)
+
+    def history(self, **kwargs):
+        return AsyncTDAHistory(self, **kwargs)
+
+    def options(self, **kwargs):
+        return AsyncTDAOptions(self, **kwargs)
+
+    def quotes(self, **kwargs):
+        return AsyncTDAQuotes(self, **kwargs)
+
+    async def history_many(self, symbols, **kwargs):
+        history = self.history(**kwargs)
+        dfs = await asyncio.gather(*[history[symbol] for symbol in symbols])
+        return dict(zip(symbols, dfs))
+
+    async def options_many(self, symbols, **kwargs):
+        options = self.options(**kwargs)
+        dfs = await asyncio.gather(*[options[symbol] for symbol in symbols])
+        return dict(zip(symbols, dfs))
+
+    async def fundamentals_many(self, symbols):
+        instruments = self.instruments
+        items = await asyncio.gather(*[instruments.fundamentals(symbol) for symbol in symbols])
+        return dict(zip(symbols, items))
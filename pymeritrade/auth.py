@@ -2,13 +2,16 @@ from urllib.parse import unquote_plus
 import webbrowser
 import time
 
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions
-from selenium import webdriver
-
 from pymeritrade.errors import TDAPermissionsError
+from pymeritrade.utils import lazy_import
+
+# selenium is only imported once a Selenium handler actually drives a browser
+SELENIUM_HINT = "selenium is required for the Selenium auth handlers (pip install pymeritrade[selenium])"
+webdriver = lazy_import("selenium.webdriver", SELENIUM_HINT)
+chrome = lazy_import("selenium.webdriver.chrome.options", SELENIUM_HINT)
+by = lazy_import("selenium.webdriver.common.by", SELENIUM_HINT)
+ui = lazy_import("selenium.webdriver.support.ui", SELENIUM_HINT)
+expected_conditions = lazy_import("selenium.webdriver.support.expected_conditions", SELENIUM_HINT)
 
 
 class DefaultAuthHandler:
@@ -95,14 +98,14 @@ class SeleniumHandler(DefaultAuthHandler):
         self._accept()
         self.wait_a_little()
         phone_xpath = '//label[@for="smsnumber0_{}"]'.format(self.get_phone_idx())
-        self.driver.find_element(By.XPATH, phone_xpath).click()
+        self.driver.find_element(by.By.XPATH, phone_xpath).click()
         self._accept()
         self._type_field("smscode0", self.get_sms_code())
         time.sleep(3)
         self._accept()
         self.wait_a_little()
         trust_xpath = '//label[@for="trustthisdevice0_0"]'
-        self.driver.find_element(By.XPATH, trust_xpath).click()
+        self.driver.find_element(by.By.XPATH, trust_xpath).click()
         self._accept()
         self.wait_a_little()
         self._accept()
@@ -112,19 +115,19 @@ class SeleniumHandler(DefaultAuthHandler):
         return code
 
     def _type_field(self, elem_id, text):
-        wait = WebDriverWait(self.driver, 10)
-        wait.until(expected_conditions.element_to_be_clickable((By.ID, elem_id)))
+        wait = ui.WebDriverWait(self.driver, 10)
+        wait.until(expected_conditions.element_to_be_clickable((by.By.ID, elem_id)))
         elem = self.driver.find_element_by_id(elem_id)
         elem.send_keys(text)
 
     def _click_xpath(self, xpath):
-        wait = WebDriverWait(self.driver, 10)
-        wait.until(expected_conditions.element_to_be_clickable((By.XPATH, xpath)))
+        wait = ui.WebDriverWait(self.driver, 10)
+        wait.until(expected_conditions.element_to_be_clickable((by.By.XPATH, xpath)))
         self.driver.find_element_by_xpath(xpath).click()
 
     def _accept(self):
-        wait = WebDriverWait(self.driver, 10)
-        wait.until(expected_conditions.element_to_be_clickable((By.ID, "accept")))
+        wait = ui.WebDriverWait(self.driver, 10)
+        wait.until(expected_conditions.element_to_be_clickable((by.By.ID, "accept")))
         self.driver.find_element_by_id("accept").click()
 
 
@@ -162,7 +165,7 @@ class SeleniumQuestionHandler(SeleniumHandler):
 
 class SeleniumHeadlessHandler(SeleniumHandler):
     def get_driver(self):
-        chrome_options = Options()
+        chrome_options = chrome.Options()
         chrome_options.add_argument("--headless")
         chrome_options.add_argument("--window-size=1920x1080")
         return webdriver.Chrome(chrome_options=chrome_options)
@@ -170,7 +173,7 @@ class SeleniumHeadlessHandler(SeleniumHandler):
 
 class SeleniumHeadlessQuestionHandler(SeleniumQuestionHandler):
     def get_driver(self):
-        chrome_options = Options()
+        chrome_options = chrome.Options()
         chrome_options.add_argument("--headless")
         chrome_options.add_argument("--window-size=1920x1080")
         return webdriver.Chrome(chrome_options=chrome_options)
\ No newline at end of file
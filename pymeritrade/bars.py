@@ -0,0 +1,256 @@
+import threading
+import re
+
+from pymeritrade.errors import TDAUsageError, check_assert
+from pymeritrade.stream.queues import TDAStreamQueue
+from pymeritrade.history import CANDLE_COLS
+from pymeritrade.utils import np, parse_date_cols, pd
+
+BAR_COLS = ["open", "high", "low", "close", "volume"]
+INTERVAL_UNITS = {"s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+# QUOTE (LEVELONE_EQUITIES) fields: last price, cumulative day volume, trade time (ms)
+QUOTE_PRICE, QUOTE_VOLUME, QUOTE_TIME = "3", "8", "51"
+# CHART_EQUITY fields: open, high, low, close, volume, chart time (ms)
+CHART_FIELDS, CHART_TIME = ("1", "2", "3", "4", "5"), "7"
+
+
+def interval_ms(interval):
+    if type(interval) in (int, float):
+        return int(interval * 1000)
+    match = re.fullmatch(r"(\d+)([smhd])", interval)
+    check_assert(match is not None, "interval must be seconds or like 1s, 5m, 1h, 1d")
+    return int(match.group(1)) * INTERVAL_UNITS[match.group(2)] * 1000
+
+
+class TDABarBuffer:
+    def __init__(self, maxlen=10000, capacity=64):
+        self.maxlen = maxlen
+        capacity = min(maxlen, capacity)
+        self.times = np.zeros(capacity, dtype="int64")
+        self.values = np.zeros((capacity, len(BAR_COLS)), dtype="float64")
+        self.head = 0
+        self.count = 0
+
+    def _reserve(self, needed):
+        # storage doubles up to maxlen, so thousands of quiet symbols don't each hold a full ring
+        size = len(self.times)
+        if needed <= size or size == self.maxlen:
+            return
+        size = min(self.maxlen, max(needed, size * 2))
+        # below maxlen nothing has been overwritten yet, so [:count] is in order
+        times = np.zeros(size, dtype="int64")
+        values = np.zeros((size, len(BAR_COLS)), dtype="float64")
+        times[: self.count] = self.times[: self.count]
+        values[: self.count] = self.values[: self.count]
+        self.times, self.values = times, values
+        self.head = self.count
+
+    def append(self, ts, bar):
+        self._reserve(self.count + 1)
+        size = len(self.times)
+        self.times[self.head] = ts
+        self.values[self.head] = bar
+        self.head = (self.head + 1) % size
+        self.count = min(self.count + 1, size)
+
+    def extend(self, times, values):
+        self._reserve(self.count + len(times))
+        size = len(self.times)
+        times, values = times[-size:], values[-size:]
+        idxs = (self.head + np.arange(len(times))) % size
+        self.times[idxs] = times
+        self.values[idxs] = values
+        self.head = (self.head + len(times)) % size
+        self.count = min(self.count + len(times), size)
+
+    def arrays(self):
+        # chronological copies; the ring is only unrolled when read
+        if self.count < len(self.times):
+            return self.times[: self.count].copy(), self.values[: self.count].copy()
+        order = np.r_[self.head : len(self.times), 0 : self.head]
+        return self.times[order], self.values[order]
+
+    def __len__(self):
+        return self.count
+
+
+class TDABarBuilder:
+    def __init__(self, interval="1m", maxlen=10000, on_bar=None, queue_size=10000, parse_dates=True):
+        self.interval = interval_ms(interval)
+        self.maxlen = maxlen
+        self.on_bar = on_bar
+        self.parse_dates = parse_dates
+        # reentrant so on_bar callbacks can read frames
+        self.lock = threading.RLock()
+        self.buffers = {}
+        # symbol -> [bar start ms, open, high, low, close, volume] of the bar still forming
+        self.current = {}
+        # symbol -> start of the newest completed bar
+        self.last_start = {}
+        self.last_cum_volume = {}
+        self.last_price = {}
+        self.bar_q = TDAStreamQueue(maxsize=queue_size, overflow="drop_oldest")
+        self.late = 0
+        self.thread = None
+
+    def _buffer(self, symbol):
+        buf = self.buffers.get(symbol)
+        if buf is None:
+            buf = self.buffers[symbol] = TDABarBuffer(self.maxlen)
+        return buf
+
+    def _complete(self, symbol, bar):
+        self._buffer(symbol).append(bar[0], bar[1:])
+        self.last_start[symbol] = bar[0]
+        bar_dict = dict(zip(CANDLE_COLS, bar[1:] + bar[:1]))
+        self.bar_q.put((symbol, bar_dict))
+        if self.on_bar is not None:
+            self.on_bar(symbol, bar_dict)
+
+    def _bar_for(self, symbol, ts):
+        start = ts - ts % self.interval
+        bar = self.current.get(symbol)
+        if bar is not None and start > bar[0]:
+            self._complete(symbol, bar)
+            bar = None
+        # ticks older than the forming bar, or for a bar already emitted (e.g. by flush), are dropped
+        earliest = bar[0] if bar is not None else self.last_start.get(symbol, start - 1) + 1
+        if start < earliest:
+            self.late += 1
+            return None
+        if bar is None:
+            bar = self.current[symbol] = [start, None, None, None, None, 0.0]
+        return bar
+
+    def _merge(self, bar, open_, high, low, close, volume):
+        if bar[1] is None:
+            bar[1], bar[2], bar[3] = open_, high, low
+        else:
+            bar[2] = max(bar[2], high)
+            bar[3] = min(bar[3], low)
+        bar[4] = close
+        bar[5] += volume
+
+    def add_tick(self, symbol, ts, price=None, cum_volume=None):
+        volume = 0.0
+        if cum_volume is not None:
+            prev = self.last_cum_volume.get(symbol)
+            # the first cumulative value only sets the baseline; a drop means the session rolled over
+            if prev is not None:
+                volume = cum_volume - prev if cum_volume >= prev else cum_volume
+            self.last_cum_volume[symbol] = cum_volume
+        if price is None:
+            price = self.last_price.get(symbol)
+            if price is None:
+                return
+        else:
+            self.last_price[symbol] = price
+        bar = self._bar_for(symbol, ts)
+        if bar is not None:
+            self._merge(bar, price, price, price, price, volume)
+
+    def add_bar(self, symbol, ts, open_, high, low, close, volume):
+        bar = self._bar_for(symbol, ts)
+        if bar is not None:
+            self._merge(bar, open_, high, low, close, volume)
+            self.last_price[symbol] = close
+
+    def update(self, data):
+        # reads the raw stream items so no per-tick decoding happens; feed one source (quote or chart) per symbol
+        with self.lock:
+            if data.name == "quote":
+                for item in data.raw:
+                    price = item.get(QUOTE_PRICE)
+                    cum_volume = item.get(QUOTE_VOLUME)
+                    if price is None and cum_volume is None:
+                        continue
+                    ts = item.get(QUOTE_TIME, data.timestamp)
+                    self.add_tick(item["key"], ts, price, cum_volume)
+            elif data.name == "chart":
+                for item in data.raw:
+                    if CHART_TIME not in item:
+                        continue
+                    self.add_bar(item["key"], item[CHART_TIME], *[float(item.get(field, 0)) for field in CHART_FIELDS])
+            else:
+                raise TDAUsageError("bars can only be built from quote or chart data, not " + data.name)
+
+    def flush(self, now_ms):
+        # closes bars whose interval has passed even if no newer tick arrived (illiquid symbols)
+        with self.lock:
+            for symbol, bar in list(self.current.items()):
+                if bar[1] is not None and now_ms >= bar[0] + self.interval:
+                    self._complete(symbol, bar)
+                    del self.current[symbol]
+
+    def consume(self, data_iter, background=True):
+        def run():
+            for data in data_iter:
+                self.update(data)
+
+        if not background:
+            return run()
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+        return self.thread
+
+    def bars(self, timeout=None):
+        while True:
+            yield self.bar_q.get(timeout)
+
+    def _seed_frames(self, history, symbol):
+        if symbol is not None:
+            return {symbol: history}
+        if isinstance(history.index, pd.MultiIndex):
+            return {sym: df.droplevel("symbol") for sym, df in history.groupby(level="symbol")}
+        if isinstance(history.columns, pd.MultiIndex):
+            return {sym: history[sym] for sym in history.columns.get_level_values(0).unique()}
+        check_assert("close" not in history.columns, "symbol is required to seed from single symbol history")
+        symbols = sorted({col.rsplit("_", 1)[0] for col in history.columns})
+        return {sym: history[[sym + "_" + col for col in BAR_COLS]].set_axis(BAR_COLS, axis=1) for sym in symbols}
+
+    def seed(self, history, symbol=None):
+        # any TDAHistory layout; single-symbol frames need symbol=
+        for sym, df in self._seed_frames(history, symbol).items():
+            df = df.dropna(subset=["close"])
+            if len(df) == 0:
+                continue
+            index = df.index
+            if np.issubdtype(index.dtype, np.datetime64):
+                times = np.asarray((index - pd.Timestamp(0)) // pd.Timedelta(milliseconds=1), dtype="int64")
+            else:
+                times = np.asarray(index, dtype="int64")
+            starts = times - times % self.interval
+            # resample finer history (e.g. 1m candles into 5m bars) onto this builder's grid
+            bars = df[BAR_COLS].astype("float64").groupby(starts, sort=True)
+            bars = bars.agg({"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"})
+            with self.lock:
+                buf = self._buffer(sym)
+                if len(bars) > 1:
+                    buf.extend(bars.index.values[:-1], bars.values[:-1])
+                    self.last_start[sym] = int(bars.index[-2])
+                # the newest candle may still be forming, so live ticks continue it rather than a duplicate
+                last = bars.iloc[-1]
+                self.current[sym] = [int(bars.index[-1])] + [float(last[col]) for col in BAR_COLS]
+                self.last_price[sym] = float(last["close"])
+
+    def to_frame(self, symbol, partial=False):
+        with self.lock:
+            buf = self.buffers.get(symbol)
+            times, values = buf.arrays() if buf is not None else (np.zeros(0, dtype="int64"), np.zeros((0, 5)))
+            bar = self.current.get(symbol)
+            if partial and bar is not None and bar[1] is not None:
+                times = np.append(times, bar[0])
+                values = np.vstack([values, bar[1:]])
+        df = pd.DataFrame(values, columns=BAR_COLS)
+        df["datetime"] = times
+        if self.parse_dates:
+            df = parse_date_cols(df, ["datetime"], copy=False)
+        return df.set_index("datetime")
+
+    def __getitem__(self, key):
+        if type(key) == str:
+            return self.to_frame(key)
+        # same flat layout as TDAHistory ("AAPL_open", ...)
+        df = pd.concat([self.to_frame(symbol) for symbol in key], axis=1, keys=key).sort_index()
+        df.columns = [symbol + "_" + col for symbol, col in df.columns]
+        return df
@@ -0,0 +1,66 @@
+from collections import OrderedDict
+import threading
+import json
+import time
+
+
+class TDACache:
+    def __init__(self, maxsize=10000, ttl=None, path=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = path
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+        if path is not None:
+            self.load(path)
+
+    def get(self, key, default=None):
+        with self.lock:
+            item = self.items.get(key)
+            if item is None:
+                return default
+            if self.ttl is not None and time.time() - item[0] > self.ttl:
+                del self.items[key]
+                return default
+            self.items.move_to_end(key)
+            return item[1]
+
+    def set(self, key, value, ts=None):
+        with self.lock:
+            self.items[key] = (ts if ts is not None else time.time(), value)
+            self.items.move_to_end(key)
+            while len(self.items) > self.maxsize:
+                self.items.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self.lock:
+            item = self.items.pop(key, None)
+        return default if item is None else item[1]
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __len__(self):
+        return len(self.items)
+
+    def save(self, path=None):
+        path = path if path is not None else self.path
+        with self.lock:
+            items = [[key, ts, value] for key, (ts, value) in self.items.items()]
+        with open(path, "w") as cache_f:
+            json.dump(items, cache_f)
+
+    def load(self, path=None):
+        path = path if path is not None else self.path
+        try:
+            with open(path, "r") as cache_f:
+                items = json.load(cache_f)
+        except FileNotFoundError:
+            return
+        for key, ts, value in items:
+            if self.ttl is None or time.time() - ts <= self.ttl:
+                self.set(key, value, ts=ts)
@@ -1,19 +1,37 @@
-import requests
 import json
+import time
 
 from pymeritrade.stream.stream import TDAStream
 from pymeritrade.history import TDAHistory
 from pymeritrade.options import TDAOptions
-from pymeritrade.quotes import TDAQuotes
+from pymeritrade.quotes import TDAQuotes, TDAQuoteCache
 from pymeritrade.orders import TDAOrder, TDAOrders
 from pymeritrade.instruments import TDAInstruments
+from pymeritrade.account import TDAAccountSnapshot
 from pymeritrade.errors import TDAPermissionsError
 from pymeritrade.auth import DefaultAuthHandler
+from pymeritrade.transport import TDATransport
+from pymeritrade.ratelimit import TDARateLimiter, PRIORITY_DEFAULT
+from pymeritrade.codec import get_codec
 
 
 class TDAClient:
-    def __init__(self, consumer_key, auth_handler=DefaultAuthHandler, redirect_uri="http://localhost", account_idx=0):
+    def __init__(
+        self,
+        consumer_key,
+        auth_handler=DefaultAuthHandler,
+        redirect_uri="http://localhost",
+        account_idx=0,
+        transport=None,
+        account_ttl=0,
+        rate_limit=120,
+        codec=None,
+        api_url="https://api.tdameritrade.com/v1/",
+        metrics=None,
+        quote_ttl=1.0,
+    ):
         self.consumer_key = consumer_key
+        self.api_url = api_url
         self.redirect_uri = redirect_uri
         self.account_idx = account_idx
         self.account_id = None
@@ -21,18 +39,70 @@ class TDAClient:
         self.refresh_token = None
         self.last_creds_fn = None
         self.auth_handler = auth_handler(self)
-
-    def _call_api(self, path, params=None, method="GET"):
+        self.transport = transport if transport is not None else TDATransport()
+        self.quote_cache = TDAQuoteCache(self, ttl=quote_ttl)
+        self.account_ttl = account_ttl
+        self.last_snapshot = None
+        if isinstance(rate_limit, (int, float)):
+            rate_limit = TDARateLimiter(rate=rate_limit)
+        self.rate_limiter = rate_limit
+        self.codec = get_codec(codec)
+        self.metrics = metrics
+
+    def _call_api(self, path, params=None, method="GET", data=None, priority=PRIORITY_DEFAULT, raw=False):
+        waited = 0.0
+        if self.rate_limiter is not None:
+            waited = self.rate_limiter.acquire(priority)
         kwargs = {}
         kwargs["headers"] = {"Authorization": "Bearer " + self.access_token}
         if params is not None:
             kwargs["params"] = params
-        resp = requests.get("https://api.tdameritrade.com/v1/" + path, **kwargs)
+        if data is not None:
+            kwargs["json"] = data
+        if self.metrics is not None:
+            return self._call_api_measured(path, method, kwargs, raw, waited)
+        resp = self.transport.request(method, self.api_url + path, **kwargs)
+        return self._parse_resp(resp, raw)
+
+    def _parse_resp(self, resp, raw=False):
+        if raw:
+            return resp.content
+        if not resp.content:
+            # order placement/cancellation replies with an empty body
+            return {}
         try:
-            return resp.json()
-        except json.decoder.JSONDecodeError:
+            return self.codec.loads(resp.content)
+        except ValueError:
             return {"error": "parse error", "content": resp.text}
 
+    def _call_api_measured(self, path, method, kwargs, raw, waited):
+        start = time.perf_counter()
+        try:
+            resp = self.transport.request(method, self.api_url + path, **kwargs)
+        except Exception:
+            self.metrics.record_request(method, path, None, time.perf_counter() - start, 0.0, 0, waited, error=True)
+            raise
+        fetched = time.perf_counter()
+        result = self._parse_resp(resp, raw)
+        error = resp.status_code >= 400 or (type(result) == dict and "error" in result)
+        self.metrics.record_request(
+            method,
+            path,
+            resp.status_code,
+            fetched - start,
+            time.perf_counter() - fetched,
+            len(resp.content),
+            waited,
+            error,
+        )
+        return result
+
+    @property
+    def last_wait(self):
+        if self.rate_limiter is None:
+            return 0.0
+        return self.rate_limiter.last_wait
+
     def login(self):
         self.auth_handler.login()
 
@@ -51,7 +121,8 @@ class TDAClient:
         return True
 
     def _call_oauth(self, params):
-        return requests.post("https://api.tdameritrade.com/v1/oauth2/token", data=params).json()
+        resp = self.transport.request("POST", self.api_url + "oauth2/token", data=params)
+        return self.codec.loads(resp.content)
 
     def check_login(self):
         return "error" not in self.principles
@@ -85,25 +156,39 @@ class TDAClient:
     def accounts(self):
         return self._call_api("accounts")
 
+    def snapshot(self, fields=None):
+        params = None
+        if fields is not None:
+            params = dict(fields=fields if type(fields) == str else ",".join(fields))
+        resp = self._call_api("accounts/{}".format(self.account_id), params=params)
+        self.last_snapshot = TDAAccountSnapshot.from_json(self, resp["securitiesAccount"])
+        return self.last_snapshot
+
+    def _cached_snapshot(self):
+        snap = self.last_snapshot
+        if snap is None or snap.age >= self.account_ttl:
+            snap = self.snapshot()
+        return snap
+
     @property
     def account(self):
-        return self._call_api("accounts/{}".format(self.account_id))["securitiesAccount"]
+        return self._cached_snapshot().json
 
     @property
     def equity(self):
-        return self.account["currentBalances"]["equity"]
+        return self._cached_snapshot().equity
 
     @property
     def day_trades(self):
-        return self.account["roundTrips"]
+        return self._cached_snapshot().day_trades
 
     @property
     def buying_power(self):
-        return self.account["currentBalances"]["buyingPower"]
+        return self._cached_snapshot().buying_power
 
     @property
     def liquidation_value(self):
-        return self.account["currentBalances"]["liquidationValue"]
+        return self._cached_snapshot().liquidation_value
 
     @property
     def orders(self):
@@ -120,6 +205,11 @@ class TDAClient:
     def create_stream(self, **kwargs):
         return TDAStream(self, **kwargs)
 
+    def create_async(self, **kwargs):
+        from pymeritrade.aio import AsyncTDAClient
+
+        return AsyncTDAClient(self, **kwargs)
+
     def movers(self, index="$DJI", direction=None):
         params = {}
         if direction:
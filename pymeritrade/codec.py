@@ -0,0 +1,66 @@
+import json
+
+from pymeritrade.errors import TDAUsageError
+
+
+class JSONCodec:
+
+    name = "json"
+
+    def loads(self, data):
+        return json.loads(data)
+
+    def dumps(self, obj):
+        return json.dumps(obj)
+
+
+class OrjsonCodec:
+
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+
+        self.orjson = orjson
+
+    def loads(self, data):
+        return self.orjson.loads(data)
+
+    def dumps(self, obj):
+        return self.orjson.dumps(obj).decode("utf-8")
+
+
+class UjsonCodec:
+
+    name = "ujson"
+
+    def __init__(self):
+        import ujson
+
+        self.ujson = ujson
+
+    def loads(self, data):
+        return self.ujson.loads(data)
+
+    def dumps(self, obj):
+        return self.ujson.dumps(obj)
+
+
+CODECS = {"orjson": OrjsonCodec, "ujson": UjsonCodec, "json": JSONCodec}
+
+
+def get_codec(codec=None):
+    if codec is None:
+        for codec_cls in CODECS.values():
+            try:
+                return codec_cls()
+            except ImportError:
+                pass
+    if type(codec) == str:
+        if codec not in CODECS:
+            raise TDAUsageError("codec must be one of " + ", ".join(CODECS))
+        try:
+            return CODECS[codec]()
+        except ImportError:
+            raise TDAUsageError(codec + " is not installed")
+    return codec
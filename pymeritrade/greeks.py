@@ -0,0 +1,140 @@
+try:
+    from scipy.special import ndtr as _ndtr
+except ImportError:
+    _ndtr = None
+
+from pymeritrade.utils import np, pd
+
+DAYS_PER_YEAR = 365.0
+
+
+def norm_pdf(x):
+    return np.exp(-0.5 * x * x) / np.sqrt(2 * np.pi)
+
+
+def norm_cdf(x):
+    x = np.asarray(x, dtype="float64")
+    if _ndtr is not None:
+        return _ndtr(x)
+    # Abramowitz & Stegun 7.1.26 (|error| < 1.5e-7) when scipy isn't installed
+    z = np.abs(x) / np.sqrt(2)
+    t = 1 / (1 + 0.3275911 * z)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    erf = 1 - poly * np.exp(-z * z)
+    return 0.5 * (1 + np.sign(x) * erf)
+
+
+def _d1_d2(S, K, T, r, sigma, q):
+    vol_t = sigma * np.sqrt(T)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        d1 = (np.log(S / K) + (r - q + 0.5 * sigma * sigma) * T) / vol_t
+    return d1, d1 - vol_t
+
+
+def bs_price(S, K, T, r, sigma, is_call, q=0.0):
+    S, K, T, r, sigma, q = np.broadcast_arrays(*[np.asarray(v, dtype="float64") for v in (S, K, T, r, sigma, q)])
+    d1, d2 = _d1_d2(S, K, T, r, sigma, q)
+    disc_s = S * np.exp(-q * T)
+    disc_k = K * np.exp(-r * T)
+    call = disc_s * norm_cdf(d1) - disc_k * norm_cdf(d2)
+    put = disc_k * norm_cdf(-d2) - disc_s * norm_cdf(-d1)
+    return np.where(is_call, call, put)
+
+
+def black76_price(F, K, T, r, sigma, is_call):
+    # Black-76 is Black-Scholes on the forward with a dividend yield equal to the rate
+    return bs_price(F, K, T, r, sigma, is_call, q=r)
+
+
+def bs_greeks(S, K, T, r, sigma, is_call, q=0.0):
+    S, K, T, r, sigma, q = np.broadcast_arrays(*[np.asarray(v, dtype="float64") for v in (S, K, T, r, sigma, q)])
+    d1, d2 = _d1_d2(S, K, T, r, sigma, q)
+    sqrt_t = np.sqrt(T)
+    disc_q = np.exp(-q * T)
+    disc_r = np.exp(-r * T)
+    pdf_d1 = norm_pdf(d1)
+    sign = np.where(is_call, 1.0, -1.0)
+    cdf_d1 = norm_cdf(sign * d1)
+    cdf_d2 = norm_cdf(sign * d2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gamma = disc_q * pdf_d1 / (S * sigma * sqrt_t)
+        theta = (
+            -S * disc_q * pdf_d1 * sigma / (2 * sqrt_t)
+            - sign * r * K * disc_r * cdf_d2
+            + sign * q * S * disc_q * cdf_d1
+        )
+    # same units as the TDA chain: vega and rho per 1%, theta per calendar day
+    return {
+        "delta": sign * disc_q * cdf_d1,
+        "gamma": gamma,
+        "vega": S * disc_q * pdf_d1 * sqrt_t / 100,
+        "theta": theta / DAYS_PER_YEAR,
+        "rho": sign * K * T * disc_r * cdf_d2 / 100,
+    }
+
+
+def implied_vol(price, S, K, T, r, is_call, q=0.0, tol=1e-6, max_iter=50, low=1e-4, high=5.0):
+    price, S, K, T, r, q = np.broadcast_arrays(*[np.asarray(v, dtype="float64") for v in (price, S, K, T, r, q)])
+    is_call = np.broadcast_to(is_call, price.shape)
+    lo = np.full(price.shape, low)
+    hi = np.full(price.shape, high)
+    sigma = np.full(price.shape, 0.3)
+    for _ in range(max_iter):
+        diff = bs_price(S, K, T, r, sigma, is_call, q) - price
+        if np.nanmax(np.abs(diff), initial=0) < tol:
+            break
+        lo = np.where(diff < 0, sigma, lo)
+        hi = np.where(diff > 0, sigma, hi)
+        d1, _ = _d1_d2(S, K, T, r, sigma, q)
+        vega = S * np.exp(-q * T) * norm_pdf(d1) * np.sqrt(T)
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            newton = sigma - diff / vega
+        # Newton where it stays inside the bracket, bisection otherwise
+        sigma = np.where((vega > 1e-10) & (newton > lo) & (newton < hi), newton, (lo + hi) / 2)
+    lower = np.maximum(
+        np.where(is_call, S * np.exp(-q * T) - K * np.exp(-r * T), K * np.exp(-r * T) - S * np.exp(-q * T)), 0
+    )
+    upper = np.where(is_call, S * np.exp(-q * T), K * np.exp(-r * T))
+    return np.where((price > lower) & (price < upper) & (T > 0), sigma, np.nan)
+
+
+def _years_to_expiry(expiration, now):
+    expiration = (
+        pd.to_datetime(expiration, unit="ms") if np.issubdtype(np.asarray(expiration).dtype, np.number) else expiration
+    )
+    # expirations are naive UTC, so "now" has to be too (not the machine's local time)
+    now = pd.Timestamp.now(tz="UTC") if now is None else pd.Timestamp(now)
+    if now.tzinfo is not None:
+        now = now.tz_convert("UTC").tz_localize(None)
+    seconds = (pd.DatetimeIndex(expiration) - now).total_seconds()
+    return np.maximum(np.asarray(seconds, dtype="float64"), 0) / (DAYS_PER_YEAR * 24 * 60 * 60)
+
+
+def reprice_chain(
+    chain, underlying_price=None, vol=None, now=None, rate=None, price_col="mark", model="bs", forward=None
+):
+    S = chain["underlying_price"].values if underlying_price is None else underlying_price
+    S_quoted = chain["underlying_price"].values
+    K = chain["strike_price"].values.astype("float64")
+    T = _years_to_expiry(chain["expiration_date"].values, now)
+    r = chain["interest_rate"].values.astype("float64") / 100 if rate is None else rate
+    is_call = (chain["put_call"].astype(str) == "CALL").values
+    q = 0.0
+    if model == "black76":
+        # Black-76 prices off the forward (e.g. a futures price); without one it is carried from the spot
+        q = r
+        carry = np.exp(r * T)
+        S, S_quoted = (forward, forward) if forward is not None else (S * carry, S_quoted * carry)
+    out = pd.DataFrame(index=chain.index)
+    if vol is None:
+        sigma = implied_vol(chain[price_col].values, S_quoted, K, T, r, is_call, q=q)
+        out["iv"] = sigma
+    elif type(vol) == str:
+        # e.g. vol="volatility" revalues with the server's per-contract volatility (in percent)
+        sigma = chain[vol].values.astype("float64") / 100
+    else:
+        sigma = vol
+    out["theo_price"] = bs_price(S, K, T, r, sigma, is_call, q=q)
+    for name, values in bs_greeks(S, K, T, r, sigma, is_call, q=q).items():
+        out[name] = values
+    return out
@@ -1,8 +1,17 @@
 from datetime import datetime
-import pandas as pd
 
-from pymeritrade.errors import TDAAPIError
-from pymeritrade.utils import parse_date_cols
+from pymeritrade.errors import TDAAPIError, check_assert
+from pymeritrade.ratelimit import PRIORITY_BULK
+from pymeritrade.utils import parse_date_cols, pd, run_parallel
+
+LAYOUTS = ["flat", "multi", "long"]
+CANDLE_COLS = ["open", "high", "low", "close", "volume", "datetime"]
+CANDLE_DTYPES = ["float64", "float64", "float64", "float64", "int64", "int64"]
+SPAN_DAYS = {"day": 10, "month": 31, "year": 366}
+FREQ_DAYS = {"minute": 1 / (24 * 60), "daily": 1, "weekly": 7, "monthly": 31}
+MS_PER_DAY = 24 * 60 * 60 * 1000
+# the API only keeps intraday (minute) bars for roughly the last 9 months
+MINUTE_RETENTION_DAYS = 270
 
 
 class TDAHistory:
@@ -19,35 +28,124 @@ class TDAHistory:
         self.extended = kwargs.get("extended", True)
         self.start = kwargs.get("start")
         self.end = kwargs.get("end")
+        self.max_workers = kwargs.get("max_workers", 8)
+        self.layout = kwargs.get("layout", "flat")
+        self.store = kwargs.get("store")
+        self.chunk_days = kwargs.get("chunk_days", 10)
+        check_assert(self.layout in LAYOUTS, "layout must be one of " + ", ".join(LAYOUTS))
 
-    def _query_history(self, symbol):
+    def _history_params(self, start=None, end=None):
         params = dict(periodType=self.span, frequencyType=self.freq, needExtendedHoursData=str(self.extended).lower())
-        if self.start is not None:
-            params["startDate"] = _date_to_ms(self.start)
-        if self.end is not None:
-            params["endDate"] = _date_to_ms(self.end)
-        resp = self.client._call_api("marketdata/{}/pricehistory".format(symbol), params=params)
+        start = start if start is not None else self.start
+        end = end if end is not None else self.end
+        if start is not None:
+            params["startDate"] = _date_to_ms(start)
+        if end is not None:
+            params["endDate"] = _date_to_ms(end)
+        return params
+
+    def _parse_candles(self, resp):
         if "candles" not in resp:
             raise TDAAPIError(resp["error"])
-        df = pd.DataFrame(resp["candles"])
+        if len(resp["candles"]) == 0:
+            return _empty_candles()
+        return pd.DataFrame(resp["candles"])
+
+    def _format_candles(self, df):
         if self.parse_dates:
             df = parse_date_cols(df, ["datetime"])
         df = df.set_index("datetime")
         return df
 
+    def _fetch_range(self, symbol, start, end):
+        resp = self.client._call_api(
+            "marketdata/{}/pricehistory".format(symbol), params=self._history_params(start, end), priority=PRIORITY_BULK
+        )
+        return self._parse_candles(resp)
+
+    def _chunk_range(self, start, end):
+        if self.freq != "minute" or start is None:
+            return [(start, end)]
+        end_ms = _date_to_ms(end if end is not None else datetime.now())
+        # older minute bars don't exist upstream, so e.g. span="all" isn't split into thousands of empty requests
+        start_ms = max(_date_to_ms(start), end_ms - MINUTE_RETENTION_DAYS * MS_PER_DAY)
+        step = self.chunk_days * MS_PER_DAY
+        if end_ms - start_ms <= step:
+            return [(start_ms, end)]
+        return [(chunk_start, min(chunk_start + step, end_ms)) for chunk_start in range(start_ms, end_ms, step)]
+
+    def _fetch_candles(self, symbol, start=None, end=None):
+        start = start if start is not None else self.start
+        end = end if end is not None else self.end
+        chunks = self._chunk_range(start, end)
+        if len(chunks) == 1:
+            return self._fetch_range(symbol, *chunks[0])
+        return self._stitch_candles(
+            run_parallel(lambda chunk: self._fetch_range(symbol, *chunk), chunks, self.max_workers)
+        )
+
+    def _stitch_candles(self, parts):
+        # later parts win on overlapping bars
+        parts = [part for part in parts if len(part) > 0]
+        if len(parts) == 0:
+            return _empty_candles()
+        df = pd.concat(parts, ignore_index=True)
+        return df.drop_duplicates("datetime", keep="last").sort_values("datetime", ignore_index=True)
+
+    def _store_plan(self, symbol):
+        # -> (start_ms, end_ms, cached, meta, ranges still to fetch); shared by the sync and async clients
+        end_ms = _date_to_ms(self.end if self.end is not None else datetime.now())
+        start_ms = _date_to_ms(self.start) if self.start is not None else _span_start(self.span, end_ms)
+        cached, meta = self.store.load(symbol, self.freq, self.extended)
+        if cached is None:
+            return start_ms, end_ms, None, {"start": start_ms}, [(start_ms, end_ms)]
+        ranges = []
+        if start_ms < meta["start"]:
+            ranges.append((start_ms, meta["start"]))
+            meta["start"] = start_ms
+        # bars up to meta["end"] were already final when stored; past it, the last stored bar may still have been
+        # forming, so the tail refetch starts on it
+        last_ms = int(cached["datetime"].max()) if len(cached) > 0 else meta["start"]
+        if end_ms > max(meta.get("end", last_ms), last_ms):
+            ranges.append((last_ms, end_ms))
+        return start_ms, end_ms, cached, meta, ranges
+
+    def _store_merge(self, symbol, plan, parts):
+        start_ms, end_ms, cached, meta, _ = plan
+        df = self._stitch_candles(([cached] if cached is not None else []) + list(parts))
+        # only an end at least one bar in the past counts as covered, a bar ending later may still change
+        settled_ms = _date_to_ms(datetime.now()) - int(FREQ_DAYS.get(self.freq, 1) * MS_PER_DAY)
+        meta["end"] = max(meta.get("end", start_ms), min(end_ms, settled_ms))
+        self.store.save(symbol, self.freq, self.extended, df, meta)
+        return df[(df["datetime"] >= start_ms) & (df["datetime"] <= end_ms)]
+
+    def _stored_candles(self, symbol):
+        plan = self._store_plan(symbol)
+        return self._store_merge(symbol, plan, [self._fetch_candles(symbol, *span) for span in plan[-1]])
+
+    def _query_history(self, symbol):
+        if self.store is not None:
+            df = self._stored_candles(symbol)
+        else:
+            df = self._fetch_candles(symbol)
+        return self._format_candles(df)
+
+    def _join_history(self, symbols, dfs):
+        if len(dfs) == 0:
+            return None
+        if self.layout == "long":
+            return pd.concat(dfs, keys=symbols, names=["symbol"]).sort_index()
+        df = pd.concat(dfs, axis=1, keys=symbols).sort_index()
+        if self.layout == "flat":
+            df.columns = [symbol + "_" + col for symbol, col in df.columns]
+        return df
+
     def __getitem__(self, key):
         df = None
         if type(key) == str:
             df = self._query_history(key)
         elif type(key) == list:
-            for symbol in key:
-                sym_df = self._query_history(symbol)
-                col_map = {c: symbol + "_" + c for c in sym_df.columns}
-                sym_df = sym_df.rename(columns=col_map)
-                if df is None:
-                    df = sym_df
-                else:
-                    df = df.merge(sym_df, how="outer", left_index=True, right_index=True)
+            df = self._join_history(key, run_parallel(self._query_history, key, self.max_workers))
         return df
 
 
@@ -55,3 +153,14 @@ def _date_to_ms(date_or_ts):
     if type(date_or_ts) == int:
         return date_or_ts
     return int(date_or_ts.timestamp() * 1000)
+
+
+def _span_start(span, end_ms):
+    # the span counts back from the requested end, not from today
+    if span == "ytd":
+        return _date_to_ms(datetime(datetime.fromtimestamp(end_ms / 1000).year, 1, 1))
+    return end_ms - SPAN_DAYS.get(span, 366) * MS_PER_DAY
+
+
+def _empty_candles():
+    return pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in zip(CANDLE_COLS, CANDLE_DTYPES)})
@@ -1,4 +1,6 @@
 from pymeritrade.errors import TDAAPIError
+from pymeritrade.cache import TDACache
+from pymeritrade.utils import batch_symbols, clean_col_names, pd, run_parallel
 
 
 class TDAInstrument:
@@ -17,7 +19,7 @@ class TDAInstrument:
 
     @property
     def quote(self):
-        return self.client.quotes()[self.symbol]
+        return self.client.quote_cache.get(self.symbol)
 
     @property
     def fundamentals(self):
@@ -35,21 +37,69 @@ class TDAInstrument:
 
 class TDAInstruments:
 
-    CACHE = {}
+    CACHE = TDACache(maxsize=10000, ttl=24 * 60 * 60)
 
-    def __init__(self, client):
+    def __init__(self, client, max_workers=8):
         self.client = client
+        self.max_workers = max_workers
+
+    def _instruments_params(self, query, search):
+        return {"symbol": query, "projection": search}
 
     def _query_instruments(self, query, search):
-        return self.client._call_api("instruments", params={"symbol": query, "projection": search})
+        return self.client._call_api("instruments", params=self._instruments_params(query, search))
+
+    def _fundamentals_batch(self, symbols):
+        data = self._query_instruments(",".join(symbols), "fundamental")
+        if "error" in data:
+            raise TDAAPIError(data["error"])
+        return {symbol: item["fundamental"] for symbol, item in data.items() if "fundamental" in item}
+
+    def _fundamentals_frame(self, rows):
+        df = pd.DataFrame.from_dict(rows, orient="index").infer_objects()
+        df = clean_col_names(df)
+        if "symbol" in df.columns:
+            df = df.drop(columns=["symbol"])
+        for col in df.columns:
+            if col.endswith("_date"):
+                df[col] = pd.to_datetime(df[col], errors="coerce")
+        df.index.name = "symbol"
+        return df
 
     def fundamentals(self, query):
-        return self._query_instruments(query, "fundamental")[query]["fundamental"]
-
-    def __getitem__(self, symbol):
-        if symbol in TDAInstruments.CACHE:
-            return TDAInstruments.CACHE[symbol]
-        data = self._query_instruments(symbol, "symbol-search")
-        if symbol in data:
-            return TDAInstrument.from_json(self.client, data[symbol])
-        raise TDAAPIError(f"{symbol} not found.")
+        if type(query) == str:
+            return self._query_instruments(query, "fundamental")[query]["fundamental"]
+        rows = {}
+        for batch in run_parallel(self._fundamentals_batch, batch_symbols(list(query)), self.max_workers):
+            rows.update(batch)
+        return self._fundamentals_frame(rows)
+
+    def _search_batch(self, symbols):
+        data = self._query_instruments(",".join(symbols), "symbol-search")
+        if "error" in data:
+            raise TDAAPIError(data["error"])
+        return data
+
+    def _lookup(self, symbols):
+        found = {}
+        missing = []
+        for symbol in symbols:
+            data = TDAInstruments.CACHE.get(symbol)
+            if data is None:
+                missing.append(symbol)
+            else:
+                found[symbol] = data
+        batches = batch_symbols(list(dict.fromkeys(missing)))
+        for data in run_parallel(self._search_batch, batches, self.max_workers):
+            for symbol, item in data.items():
+                TDAInstruments.CACHE.set(symbol, item)
+                found[symbol] = item
+        for symbol in symbols:
+            if symbol not in found:
+                raise TDAAPIError(f"{symbol} not found.")
+        return [TDAInstrument.from_json(self.client, found[symbol]) for symbol in symbols]
+
+    def __getitem__(self, key):
+        if type(key) == str:
+            return self._lookup([key])[0]
+        return self._lookup(list(key))
@@ -0,0 +1,285 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from collections import defaultdict
+from functools import lru_cache
+from bisect import bisect_left
+import threading
+import logging
+import socket
+import time
+import re
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+RATE_WINDOW = 1.0
+# the limiter reports its own lock overhead as a wait; anything shorter isn't a throttle
+THROTTLE_MIN_WAIT = 0.001
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=4096)
+def endpoint_name(path):
+    # symbols, account and order ids become {} so e.g. every pricehistory call shares one series
+    return "/".join(part if re.fullmatch("[a-z]+", part) else "{}" for part in path.split("/"))
+
+
+class TDAHistogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def percentile(self, pct):
+        # upper bound of the bucket holding the percentile
+        if self.count == 0:
+            return None
+        target = pct / 100 * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return float("inf")
+
+    def stats(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count > 0 else None,
+            "p50": self.percentile(50),
+            "p99": self.percentile(99),
+        }
+
+
+class _EndpointStats:
+    def __init__(self, buckets):
+        self.requests = 0
+        self.errors = 0
+        self.throttles = 0
+        self.throttle_wait = 0.0
+        self.bytes = 0
+        self.network = 0.0
+        self.parse = 0.0
+        self.latency = TDAHistogram(buckets)
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "throttles": self.throttles,
+            "throttle_wait": self.throttle_wait,
+            "bytes": self.bytes,
+            "network": self.network,
+            "parse": self.parse,
+            "latency": self.latency.stats(),
+        }
+
+
+class _ServiceStats:
+    def __init__(self, buckets):
+        self.messages = 0
+        self.items = 0
+        self.lag = TDAHistogram(buckets)
+        self.window_start = None
+        self.window_count = 0
+        self.rate = 0.0
+
+    def stats(self):
+        return {"messages": self.messages, "items": self.items, "rate": self.rate, "lag": self.lag.stats()}
+
+
+class TDAMetrics:
+    def __init__(self, buckets=LATENCY_BUCKETS, lag_buckets=LAG_BUCKETS, callbacks=None):
+        self.buckets = buckets
+        self.lag_buckets = lag_buckets
+        self.callbacks = list(callbacks or [])
+        self.lock = threading.Lock()
+        self.endpoints = defaultdict(lambda: _EndpointStats(self.buckets))
+        self.services = defaultdict(lambda: _ServiceStats(self.lag_buckets))
+        self.frames = 0
+        self.frame_bytes = 0
+        self.frame_parse = 0.0
+
+    def add_callback(self, callback):
+        self.callbacks.append(callback)
+
+    def _emit(self, kind, name, values):
+        for callback in self.callbacks:
+            # callbacks run inline in API calls and the stream thread, so their errors must not escape
+            try:
+                callback(kind, name, values)
+            except Exception:
+                logger.exception("metrics callback %r failed", callback)
+
+    def record_request(self, method, path, status, network, parse, size, wait=0.0, error=False):
+        name = endpoint_name(path)
+        throttled = wait > THROTTLE_MIN_WAIT or status == 429
+        with self.lock:
+            ep_stats = self.endpoints[(method, name)]
+            ep_stats.requests += 1
+            ep_stats.errors += error
+            ep_stats.throttles += throttled
+            ep_stats.throttle_wait += wait
+            ep_stats.bytes += size
+            ep_stats.network += network
+            ep_stats.parse += parse
+            ep_stats.latency.observe(network + parse)
+        if self.callbacks:
+            values = {
+                "method": method,
+                "status": status,
+                "network": network,
+                "parse": parse,
+                "bytes": size,
+                "wait": wait,
+                "error": error,
+                "throttled": throttled,
+            }
+            self._emit("request", name, values)
+
+    def record_frame(self, size, parse):
+        with self.lock:
+            self.frames += 1
+            self.frame_bytes += size
+            self.frame_parse += parse
+
+    def record_stream(self, service, items, timestamp=None, received=None):
+        received = time.time() if received is None else received
+        # server timestamp (ms) to receive time; includes clock skew between TDA and this machine
+        lag = received - timestamp / 1000 if timestamp is not None else None
+        with self.lock:
+            svc_stats = self.services[service]
+            svc_stats.messages += 1
+            svc_stats.items += items
+            if lag is not None:
+                svc_stats.lag.observe(max(lag, 0.0))
+            if svc_stats.window_start is None:
+                svc_stats.window_start = received
+            elif received - svc_stats.window_start >= RATE_WINDOW:
+                svc_stats.rate = svc_stats.window_count / (received - svc_stats.window_start)
+                svc_stats.window_start = received
+                svc_stats.window_count = 0
+            svc_stats.window_count += 1
+        if self.callbacks:
+            self._emit("stream", service, {"items": items, "lag": lag})
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "requests": {
+                    method + " " + name: ep_stats.stats() for (method, name), ep_stats in self.endpoints.items()
+                },
+                "streams": {service: svc_stats.stats() for service, svc_stats in self.services.items()},
+                "frames": {"count": self.frames, "bytes": self.frame_bytes, "parse": self.frame_parse},
+            }
+
+    def reset(self):
+        with self.lock:
+            self.endpoints.clear()
+            self.services.clear()
+            self.frames = 0
+            self.frame_bytes = 0
+            self.frame_parse = 0.0
+
+    def to_prometheus(self, prefix="pymeritrade"):
+        lines = []
+
+        def metric(name, kind, samples):
+            lines.append("# TYPE {}_{} {}".format(prefix, name, kind))
+            for labels, value in samples:
+                lines.append("{}_{}{} {}".format(prefix, name, _prom_labels(labels), value))
+
+        def histogram(name, samples):
+            lines.append("# TYPE {}_{} histogram".format(prefix, name))
+            for labels, hist in samples:
+                seen = 0
+                for bound, count in zip(list(hist.buckets) + ["+Inf"], hist.counts):
+                    seen += count
+                    lines.append("{}_{}_bucket{} {}".format(prefix, name, _prom_labels(dict(labels, le=bound)), seen))
+                lines.append("{}_{}_sum{} {}".format(prefix, name, _prom_labels(labels), hist.sum))
+                lines.append("{}_{}_count{} {}".format(prefix, name, _prom_labels(labels), hist.count))
+
+        with self.lock:
+            endpoints = [
+                ({"method": method, "endpoint": name}, stats) for (method, name), stats in self.endpoints.items()
+            ]
+            services = [({"service": service}, stats) for service, stats in self.services.items()]
+            metric("requests_total", "counter", [(labels, stats.requests) for labels, stats in endpoints])
+            metric("request_errors_total", "counter", [(labels, stats.errors) for labels, stats in endpoints])
+            metric("request_throttles_total", "counter", [(labels, stats.throttles) for labels, stats in endpoints])
+            metric("response_bytes_total", "counter", [(labels, stats.bytes) for labels, stats in endpoints])
+            metric("request_network_seconds_total", "counter", [(labels, stats.network) for labels, stats in endpoints])
+            metric("request_parse_seconds_total", "counter", [(labels, stats.parse) for labels, stats in endpoints])
+            histogram("request_latency_seconds", [(labels, stats.latency) for labels, stats in endpoints])
+            metric("stream_messages_total", "counter", [(labels, stats.messages) for labels, stats in services])
+            metric("stream_items_total", "counter", [(labels, stats.items) for labels, stats in services])
+            metric("stream_message_rate", "gauge", [(labels, stats.rate) for labels, stats in services])
+            histogram("stream_lag_seconds", [(labels, stats.lag) for labels, stats in services])
+            metric("stream_frames_total", "counter", [({}, self.frames)])
+            metric("stream_frame_bytes_total", "counter", [({}, self.frame_bytes)])
+            metric("stream_parse_seconds_total", "counter", [({}, self.frame_parse)])
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port=9108, host="0.0.0.0", prefix="pymeritrade"):
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.to_prometheus(prefix).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+def _prom_labels(labels):
+    if len(labels) == 0:
+        return ""
+    return "{" + ",".join('{}="{}"'.format(key, val) for key, val in labels.items()) + "}"
+
+
+class TDAStatsdExporter:
+    def __init__(self, host="127.0.0.1", port=8125, prefix="pymeritrade"):
+        self.addr = (host, port)
+        self.prefix = prefix
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def _name(self, kind, name):
+        return "{}.{}.{}".format(self.prefix, kind, re.sub("[^A-Za-z0-9_]+", "_", name.replace("/", ".")).strip("_"))
+
+    def __call__(self, kind, name, values):
+        base = self._name(kind, name)
+        if kind == "request":
+            lines = [
+                base + ".requests:1|c",
+                base + ".network:{:.3f}|ms".format(values["network"] * 1000),
+                base + ".parse:{:.3f}|ms".format(values["parse"] * 1000),
+                base + ".bytes:{}|c".format(values["bytes"]),
+            ]
+            if values["error"]:
+                lines.append(base + ".errors:1|c")
+            if values["throttled"]:
+                lines.append(base + ".throttles:1|c")
+        else:
+            lines = [base + ".messages:1|c", base + ".items:{}|c".format(values["items"])]
+            if values["lag"] is not None:
+                lines.append(base + ".lag:{:.3f}|ms".format(values["lag"] * 1000))
+        try:
+            self.sock.sendto("\n".join(lines).encode("utf-8"), self.addr)
+        except OSError:
+            # metrics must never take down the caller
+            pass
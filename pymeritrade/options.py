@@ -1,8 +1,30 @@
-import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import defaultdict, deque
+import time
 
 from pymeritrade.errors import TDAAPIError
+from pymeritrade.codec import CODECS, get_codec
 from pymeritrade.utils import *
 
+CHAIN_DATE_COLS = ["expiration_date", "trade_time", "quote_time", "last_trading_day"]
+CHAIN_CATEGORY_COLS = ["put_call", "exchange_name"]
+CHAIN_DIFF_COLS = [
+    "bid",
+    "ask",
+    "last",
+    "mark",
+    "bid_size",
+    "ask_size",
+    "total_volume",
+    "open_interest",
+    "volatility",
+    "delta",
+    "gamma",
+    "theta",
+    "vega",
+    "rho",
+]
+
 
 class TDAOptions:
     def __init__(self, client, **kwargs):
@@ -14,8 +36,12 @@ class TDAOptions:
         self.strategy = kwargs.get("strategy", "single")
         self.strike = kwargs.get("strike")
         self.exp_month = kwargs.get("exp_month", "all")
+        self.columns = kwargs.get("columns")
+        self.float32 = kwargs.get("float32", False)
+        self.max_workers = kwargs.get("max_workers", 8)
+        self.processes = kwargs.get("processes")
 
-    def _query_options(self, symbol):
+    def _options_params(self, symbol):
         params = dict(
             symbol=symbol,
             contractType=self.contracts.upper(),
@@ -27,23 +53,146 @@ class TDAOptions:
             params["strike"] = self.strike
         if self.range is not None:
             params["strikeCount"] = self.range
-        resp = self.client._call_api("marketdata/chains".format(symbol), params=params)
-        options_all = []
-        for key in ["callExpDateMap", "putExpDateMap"]:
-            for exp, strikes in resp.get(key, {}).items():
-                for strike, options in strikes.items():
-                    options_all.extend(options)
-        df = pd.DataFrame(options_all)
-        df = clean_col_names(df)
+        return params
+
+    def _parser(self):
+        # a client-free copy that can be pickled into parse worker processes
+        return TDAOptions(None, parse_dates=self.parse_dates, columns=self.columns, float32=self.float32)
+
+    def _parse_options(self, symbol, resp):
+        if "interestRate" not in resp:
+            raise TDAAPIError(resp.get("error", "Unable to load chain for " + symbol))
+        contracts = [
+            contract
+            for key in ["callExpDateMap", "putExpDateMap"]
+            for strikes in resp.get(key, {}).values()
+            for options in strikes.values()
+            for contract in options
+        ]
+        if len(contracts) == 0:
+            return _empty_chain()
+        fields = [
+            field
+            for field in contracts[0]
+            if self.columns is None or field == "symbol" or clean_col_name(field) in self.columns
+        ]
+        df = records_to_frame(contracts, fields, [clean_col_name(field) for field in fields])
         df["stock_symbol"] = symbol
         df["interest_rate"] = resp["interestRate"]
         df["overall_volatility"] = resp["volatility"]
         df["overall_strategy"] = resp["strategy"]
-        df["vol_by_oi"] = df["total_volume"] / df["open_interest"]
+        df["underlying_price"] = resp.get("underlyingPrice")
+        if "total_volume" in df.columns and "open_interest" in df.columns:
+            df["vol_by_oi"] = df["total_volume"] / df["open_interest"]
         if self.parse_dates:
-            df = parse_date_cols(df, ["expiration_date", "trade_time", "quote_time", "last_trading_day"])
+            parse_date_cols(df, [col for col in CHAIN_DATE_COLS if col in df.columns], copy=False)
+        for col in CHAIN_CATEGORY_COLS:
+            if col in df.columns:
+                df[col] = df[col].astype("category")
+        if self.float32:
+            float_cols = df.select_dtypes("float64").columns
+            df[float_cols] = df[float_cols].astype("float32")
         df = df.set_index("symbol")
         return df
 
+    def _query_options(self, symbol):
+        resp = self.client._call_api("marketdata/chains", params=self._options_params(symbol))
+        return self._parse_options(symbol, resp)
+
+    def _fetch_options(self, symbol, pool):
+        payload = self.client._call_api("marketdata/chains", params=self._options_params(symbol), raw=True)
+        if pool is None:
+            return _parse_chain_payload(self, symbol, payload, self.client.codec)
+        codec = _portable_codec(self.client.codec)
+        return pool.submit(_parse_chain_payload, self._parser(), symbol, payload, codec).result()
+
+    def scan(self, symbols):
+        # multiprocessing is only imported when parse workers are requested
+        from concurrent.futures import ProcessPoolExecutor
+
+        pool = ProcessPoolExecutor(self.processes) if self.processes else None
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as fetchers:
+                futures = {fetchers.submit(self._fetch_options, symbol, pool): symbol for symbol in symbols}
+                for future in as_completed(futures):
+                    yield futures[future], future.result()
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+    def snapshot(self, **kwargs):
+        return TDAChainSnapshot(self, **kwargs)
+
     def __getitem__(self, key):
-        return self._query_options(key)
+        if type(key) == str:
+            return self._query_options(key)
+        key = list(key)
+        if len(key) == 0:
+            return _empty_chain()
+        chains = dict(self.scan(key))
+        return pd.concat([chains[symbol] for symbol in key])
+
+
+class TDAChainSnapshot:
+    def __init__(self, options, cols=CHAIN_DIFF_COLS, history_len=10):
+        self.options = options
+        self.cols = cols
+        self.chains = {}
+        self.removed = {}
+        # symbol -> the last history_len (poll time, changed contracts)
+        self.history = defaultdict(lambda: deque(maxlen=history_len))
+
+    def update(self, symbol, chain):
+        cols = [col for col in self.cols if col in chain.columns]
+        values = chain[cols]
+        prev = self.chains.get(symbol)
+        # only the compared columns are kept between polls
+        self.chains[symbol] = values
+        if prev is None:
+            changed = chain
+            self.removed[symbol] = chain.index[:0]
+        else:
+            self.removed[symbol] = prev.index.difference(values.index)
+            prev = prev.reindex(values.index)
+            mask = (values.ne(prev) & ~(values.isna() & prev.isna())).any(axis=1)
+            changed = chain[mask.values]
+        self.history[symbol].append((time.time(), changed))
+        return changed
+
+    def poll(self, key):
+        if type(key) == str:
+            return self.update(key, self.options[key])
+        key = list(key)
+        if len(key) == 0:
+            return _empty_chain()
+        changes = {symbol: self.update(symbol, chain) for symbol, chain in self.options.scan(key)}
+        return pd.concat([changes[symbol] for symbol in key])
+
+    def reset(self, symbol=None):
+        if symbol is None:
+            self.chains.clear()
+            self.removed.clear()
+            self.history.clear()
+        else:
+            self.chains.pop(symbol, None)
+            self.removed.pop(symbol, None)
+            self.history.pop(symbol, None)
+
+
+def _empty_chain():
+    return pd.DataFrame(index=pd.Index([], name="symbol"))
+
+
+def _portable_codec(codec):
+    # built-in codecs are rebuilt in parse workers by name; custom codecs are pickled as given
+    name = getattr(codec, "name", None)
+    return name if name in CODECS else codec
+
+
+def _parse_chain_payload(parser, symbol, payload, codec):
+    try:
+        resp = get_codec(codec).loads(payload)
+    except ValueError:
+        # the same error whether the chain is parsed in a worker process or in this one
+        raise TDAAPIError("Unable to parse chain for " + symbol)
+    return parser._parse_options(symbol, resp)
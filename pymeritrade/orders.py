@@ -1,5 +1,7 @@
 from datetime import datetime
 
+from pymeritrade.ratelimit import PRIORITY_ORDER
+
 
 class TDAOrder:
     def __init__(self, client, json_data):
@@ -23,7 +25,9 @@ class TDAOrder:
         return f"<Order ({self.id})>"
 
     def _post_order(self, symbols):
-        resp = self.client._call_api("accounts/{}/orders".format(self.client.account_id), method="POST")
+        resp = self.client._call_api(
+            "accounts/{}/orders".format(self.client.account_id), method="POST", priority=PRIORITY_ORDER
+        )
         return resp
 
     def exec(self):
@@ -44,6 +48,7 @@ class TDAOrders:
                 "fromEnteredTime": start.strftime("%Y-%m-%d"),
                 "toEnteredTime": end.strftime("%Y-%m-%d"),
             },
+            priority=PRIORITY_ORDER,
         )
         items = [TDAOrder.from_json(self.client, data) for data in resp]
         return items
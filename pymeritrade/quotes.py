@@ -1,14 +1,146 @@
+import threading
+import time
+
+from pymeritrade.cache import TDACache
 from pymeritrade.errors import TDAAPIError
+from pymeritrade.ratelimit import PRIORITY_QUOTE
+from pymeritrade.utils import batch_symbols, clean_col_names, parse_date_cols, pd, run_parallel
+
+QUOTE_DATE_COLS = ["quote_time", "trade_time", "regular_market_trade_time"]
 
 
 class TDAQuotes:
     def __init__(self, client, **kwargs):
         self.client = client
+        self.raw = kwargs.get("raw", False)
+        self.parse_dates = kwargs.get("parse_dates", True)
+        self.batch_size = kwargs.get("batch_size", 300)
+        self.max_workers = kwargs.get("max_workers", 8)
+
+    def _quotes_params(self, symbols):
+        return {"symbol": ",".join(symbols)}
 
     def _query_quotes(self, symbols):
-        return self.client._call_api("marketdata/quotes", params={"symbol": ",".join(symbols)})
+        return self.client._call_api("marketdata/quotes", params=self._quotes_params(symbols), priority=PRIORITY_QUOTE)
+
+    def _query_batches(self, symbols):
+        data = {}
+        for resp in run_parallel(self._query_quotes, batch_symbols(symbols, self.batch_size), self.max_workers):
+            if "error" in resp:
+                raise TDAAPIError(resp["error"])
+            data.update(resp)
+        return data
+
+    def _quotes_frame(self, data):
+        rows = {symbol: quote for symbol, quote in data.items() if type(quote) == dict}
+        df = pd.DataFrame.from_dict(rows, orient="index").infer_objects()
+        df = clean_col_names(df)
+        if "symbol" in df.columns:
+            df = df.drop(columns=["symbol"])
+        df.index.name = "symbol"
+        if self.parse_dates:
+            df = parse_date_cols(df, [col for col in QUOTE_DATE_COLS if col in df.columns])
+        return df
 
     def __getitem__(self, key):
         if type(key) == str:
             return self._query_quotes([key])[key]
-        return self._query_quotes(key)
+        data = self._query_batches(list(key))
+        if self.raw:
+            return data
+        return self._quotes_frame(data)
+
+
+class _QuoteBatch:
+    def __init__(self):
+        self.symbols = []
+        self.quotes = {}
+        self.error = None
+        self.done = threading.Event()
+
+
+class TDAQuoteCache:
+    def __init__(self, client, ttl=1.0, window=0.01, maxsize=10000):
+        self.client = client
+        self.window = window
+        self.lock = threading.Lock()
+        self.quotes = TDACache(maxsize=maxsize, ttl=ttl)
+        self.pending = {}
+        self.batch = None
+        self.active = 0
+
+    @property
+    def ttl(self):
+        return self.quotes.ttl
+
+    @ttl.setter
+    def ttl(self, ttl):
+        self.quotes.ttl = ttl
+
+    def _run_batch(self, batch):
+        with self.lock:
+            concurrent = self.active > 1
+        if self.window > 0 and concurrent:
+            # let other callers join this batch before it is sent; a lone caller (e.g. a loop) doesn't wait
+            time.sleep(self.window)
+        with self.lock:
+            self.batch = None
+        try:
+            batch.quotes = self.client.quotes(raw=True)[batch.symbols]
+            now = time.time()
+            for symbol, quote in batch.quotes.items():
+                self.quotes.set(symbol, quote, ts=now)
+        except Exception as e:
+            batch.error = e
+        finally:
+            with self.lock:
+                for symbol in batch.symbols:
+                    if self.pending.get(symbol) is batch:
+                        del self.pending[symbol]
+            batch.done.set()
+
+    def get_many(self, symbols):
+        with self.lock:
+            self.active += 1
+        try:
+            return self._get_many(symbols)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+    def _get_many(self, symbols):
+        result, waiting, leader = {}, {}, None
+        with self.lock:
+            for symbol in symbols:
+                cached = self.quotes.get(symbol)
+                if cached is not None:
+                    result[symbol] = cached
+                    continue
+                batch = self.pending.get(symbol)
+                if batch is None:
+                    if self.batch is None:
+                        self.batch = leader = _QuoteBatch()
+                    batch = self.batch
+                    batch.symbols.append(symbol)
+                    self.pending[symbol] = batch
+                waiting[symbol] = batch
+        if leader is not None:
+            self._run_batch(leader)
+        for symbol, batch in waiting.items():
+            batch.done.wait()
+            if batch.error is not None:
+                raise batch.error
+            if symbol not in batch.quotes:
+                raise TDAAPIError(f"No quote for {symbol}.")
+            result[symbol] = batch.quotes[symbol]
+        return result
+
+    def get(self, symbol):
+        return self.get_many([symbol])[symbol]
+
+    def invalidate(self, symbols=None):
+        if symbols is None:
+            self.quotes.clear()
+        else:
+            for symbol in symbols:
+                self.quotes.pop(symbol)
@@ -0,0 +1,164 @@
+import itertools
+import threading
+import heapq
+import time
+
+try:
+    # cross-process limiting (path=...) locks the shared state file, which needs POSIX
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from pymeritrade.errors import check_assert
+from pymeritrade.utils import lazy_import
+
+# only needed by acquire_async, and costs ~50ms to import
+asyncio = lazy_import("asyncio")
+
+PRIORITY_ORDER = 0
+PRIORITY_QUOTE = 1
+PRIORITY_DEFAULT = 2
+PRIORITY_BULK = 3
+
+
+class TDARateLimiter:
+    def __init__(self, rate=120, per=60.0, burst=10, path=None, on_wait=None):
+        self.rate = rate
+        self.per = per
+        self.capacity = max(1, burst)
+        check_assert(path is None or fcntl is not None, "path needs fcntl, which this platform doesn't provide")
+        self.path = path
+        self.on_wait = on_wait
+        self.tokens = float(self.capacity)
+        self.last = time.monotonic()
+        self.cond = threading.Condition()
+        self.waiters = []
+        self.counter = itertools.count()
+        self.local = threading.local()
+        self.count = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _refill(self, tokens, last, now):
+        return min(self.capacity, tokens + (now - last) * self.rate / self.per)
+
+    def _take_local(self):
+        now = time.monotonic()
+        self.tokens = self._refill(self.tokens, self.last, now)
+        self.last = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) * self.per / self.rate
+
+    def _take_file(self):
+        now = time.time()
+        with open(self.path, "a+") as state_f:
+            fcntl.flock(state_f, fcntl.LOCK_EX)
+            state_f.seek(0)
+            state = state_f.read().split()
+            tokens, last = (float(state[0]), float(state[1])) if len(state) == 2 else (self.capacity, now)
+            tokens = self._refill(tokens, last, now)
+            delay = 0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                delay = (1 - tokens) * self.per / self.rate
+            state_f.seek(0)
+            state_f.truncate()
+            state_f.write("{} {}".format(tokens, now))
+        return delay
+
+    def _take(self):
+        if self.path is not None:
+            return self._take_file()
+        return self._take_local()
+
+    def _record_wait(self, waited):
+        # called under the lock
+        self.local.last_wait = waited
+        self.count += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        return waited
+
+    def _report_wait(self, priority, waited):
+        # called after the lock is released, so a slow callback doesn't stall other waiters
+        if self.on_wait is not None:
+            self.on_wait(priority, waited)
+        return waited
+
+    def _notify(self):
+        self.cond.notify_all()
+        # async waiters can't wait on the condition, so the one at the head is woken through its loop
+        if len(self.waiters) > 0 and self.waiters[0][2] is not None:
+            self.waiters[0][2]()
+
+    def acquire(self, priority=PRIORITY_DEFAULT):
+        start = time.monotonic()
+        with self.cond:
+            # (priority, arrival, async wake-up or None); the arrival counter keeps ties FIFO
+            entry = (priority, next(self.counter), None)
+            heapq.heappush(self.waiters, entry)
+            self._notify()
+            try:
+                while True:
+                    delay = None
+                    # only the most urgent waiter may take a token; everyone else sleeps until notified
+                    if self.waiters[0] == entry:
+                        delay = self._take()
+                        if delay <= 0:
+                            break
+                    self.cond.wait(delay)
+            finally:
+                self._leave(entry)
+            waited = self._record_wait(time.monotonic() - start)
+        return self._report_wait(priority, waited)
+
+    def _leave(self, entry):
+        self.waiters.remove(entry)
+        heapq.heapify(self.waiters)
+        self._notify()
+
+    async def acquire_async(self, priority=PRIORITY_DEFAULT):
+        # queues in the same priority heap as acquire(), but waits on the event loop instead of the condition
+        start = time.monotonic()
+        loop = asyncio.get_event_loop()
+        wake = asyncio.Event()
+        entry = (priority, next(self.counter), lambda: loop.call_soon_threadsafe(wake.set))
+        with self.cond:
+            heapq.heappush(self.waiters, entry)
+            self._notify()
+        try:
+            while True:
+                with self.cond:
+                    delay = None
+                    if self.waiters[0] is entry:
+                        delay = self._take()
+                        if delay <= 0:
+                            break
+                    # cleared under the lock so a wake-up sent after this point isn't lost
+                    wake.clear()
+                try:
+                    await asyncio.wait_for(wake.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            with self.cond:
+                self._leave(entry)
+        with self.cond:
+            waited = self._record_wait(time.monotonic() - start)
+        return self._report_wait(priority, waited)
+
+    @property
+    def last_wait(self):
+        return getattr(self.local, "last_wait", 0.0)
+
+    def stats(self):
+        return {
+            "count": self.count,
+            "total_wait": self.total_wait,
+            "max_wait": self.max_wait,
+            "mean_wait": self.total_wait / self.count if self.count > 0 else 0.0,
+            "queued": len(self.waiters),
+        }
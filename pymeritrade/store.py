@@ -0,0 +1,52 @@
+import json
+import os
+
+from pymeritrade.errors import check_assert
+from pymeritrade.utils import pd
+
+FORMATS = ["parquet", "feather"]
+
+
+class TDACandleStore:
+    def __init__(self, path="tda-candles", fmt="parquet"):
+        check_assert(fmt in FORMATS, "fmt must be one of " + ", ".join(FORMATS))
+        self.path = os.path.expanduser(path)
+        self.fmt = fmt
+
+    def _base_path(self, symbol, freq, extended):
+        folder = freq if extended else freq + "-regular"
+        return os.path.join(self.path, folder, symbol.replace("/", "_"))
+
+    def load(self, symbol, freq, extended):
+        base = self._base_path(symbol, freq, extended)
+        try:
+            with open(base + ".json", "r") as meta_f:
+                meta = json.load(meta_f)
+        except FileNotFoundError:
+            return None, None
+        if self.fmt == "parquet":
+            df = pd.read_parquet(base + ".parquet")
+        else:
+            df = pd.read_feather(base + ".feather")
+        return df, meta
+
+    def save(self, symbol, freq, extended, df, meta):
+        base = self._base_path(symbol, freq, extended)
+        os.makedirs(os.path.dirname(base), exist_ok=True)
+        data_fn = base + "." + self.fmt
+        df = df.reset_index(drop=True)
+        if self.fmt == "parquet":
+            df.to_parquet(data_fn + ".tmp", index=False)
+        else:
+            df.to_feather(data_fn + ".tmp")
+        os.replace(data_fn + ".tmp", data_fn)
+        # the sidecar is written last so it never describes data that isn't on disk yet
+        with open(base + ".json.tmp", "w") as meta_f:
+            json.dump(meta, meta_f)
+        os.replace(base + ".json.tmp", base + ".json")
+
+    def clear(self, symbol, freq, extended):
+        base = self._base_path(symbol, freq, extended)
+        for fn in [base + ".json", base + "." + self.fmt]:
+            if os.path.exists(fn):
+                os.remove(fn)
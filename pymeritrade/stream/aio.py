@@ -0,0 +1,249 @@
+import asyncio
+import inspect
+
+from pymeritrade.errors import TDAAPIError, TDAUsageError, check_assert
+from pymeritrade.stream.stream import StreamData, TDAStream
+from pymeritrade.stream.queues import TDAStreamQueue
+
+
+class AsyncTDAStreamQueue(TDAStreamQueue):
+    def __init__(self, maxsize=0, overflow="block"):
+        super().__init__(maxsize, overflow)
+        self.readable = asyncio.Event()
+        self.writable = asyncio.Event()
+        self.writable.set()
+        self.closed = False
+
+    def put(self, item):
+        if self.overflow == "block":
+            # never wait on the event loop; the receive loop pauses on .writable instead
+            with self.cond:
+                self.puts += 1
+                self.items.append(item)
+                self.max_depth = max(self.max_depth, len(self))
+            if self._full():
+                self.writable.clear()
+        else:
+            # drop_oldest and conflate make room themselves and never hold up the stream
+            super().put(item)
+        self.readable.set()
+
+    def close(self):
+        self.closed = True
+        self.readable.set()
+        self.writable.set()
+
+    async def get_async(self):
+        while len(self) == 0:
+            if self.closed:
+                raise TDAAPIError("Stream closed")
+            self.readable.clear()
+            await self.readable.wait()
+        item = self.get(timeout=0)
+        if not self._full():
+            self.writable.set()
+        return item
+
+
+class AsyncTDASubscription:
+    def __init__(self, stream, data_q, request=None):
+        self.stream = stream
+        self.data_q = data_q
+        self.ack = None
+        if request is not None:
+            self.ack = asyncio.ensure_future(stream._request(*request))
+
+    async def _wait(self):
+        if self.ack is not None:
+            await self.ack
+        return self
+
+    def __await__(self):
+        return self._wait().__await__()
+
+    async def __aiter__(self):
+        await self._wait()
+        while True:
+            type_name, items, timestamp = await self.data_q.get_async()
+            yield StreamData(type_name, items, timestamp)
+
+
+class AsyncTDAStream(TDAStream):
+    def __init__(
+        self,
+        client,
+        debug=False,
+        queue_size=10000,
+        overflow="drop_oldest",
+        reconnect=True,
+        max_backoff=60,
+        on_gap=None,
+        codec=None,
+        recorder=None,
+        metrics=None,
+    ):
+        super().__init__(
+            None,
+            debug=debug,
+            queue_size=queue_size,
+            overflow=overflow,
+            reconnect=reconnect,
+            max_backoff=max_backoff,
+            on_gap=on_gap,
+            codec=codec,
+            recorder=recorder,
+            metrics=metrics,
+        )
+        self.client = client
+        if codec is None:
+            self.codec = client.codec
+        if metrics is None:
+            self.metrics = client.metrics
+        self.acks = {}
+        self.recv_task = None
+
+    async def start(self):
+        try:
+            import websockets
+        except ImportError:
+            raise TDAUsageError("websockets is required for AsyncTDAStream (pip install websockets)")
+        self.closing = False
+        self._load_principles(await self.client.principles)
+        self.ws = await websockets.connect(self.ws_uri, max_size=None)
+        self.ws_started = True
+        self.recv_task = asyncio.ensure_future(self._run())
+        await self._request("admin", "login", self._login_params(), "login")
+        return self
+
+    async def _recv_loop(self):
+        # newer websockets can hand over frames undecoded so the codec parses straight from bytes
+        recv_kwargs = {"decode": False} if "decode" in inspect.signature(self.ws.recv).parameters else {}
+        try:
+            while True:
+                msg = await self.ws.recv(**recv_kwargs)
+                try:
+                    self._on_ws_msg(msg)
+                except Exception as e:
+                    # a bad frame or handler is reported but doesn't drop a healthy socket
+                    self._on_ws_error(e)
+                # "block" subscriptions apply backpressure by pausing reads from the socket
+                for data_qs in list(self.data_qs.values()):
+                    for data_q in data_qs:
+                        if data_q.overflow == "block":
+                            await data_q.writable.wait()
+        except Exception as e:
+            # recv() failures (incl. ConnectionClosed); the supervisor decides whether to reconnect
+            self._on_ws_error(e)
+        finally:
+            was_ready = self.ws_ready
+            self.ws_ready = False
+            self._on_ws_close()
+            for ack in self.acks.values():
+                if not ack.done():
+                    ack.set_exception(TDAAPIError("Stream closed"))
+            self.acks.clear()
+        return was_ready
+
+    async def _resume(self):
+        # login and replay subscriptions on a new socket, acknowledged one by one like the originals
+        try:
+            await self._request("admin", "login", self._login_params(), "login")
+            for service, cmd, cmd_params in list(self.subs.values()):
+                await self._request(service, cmd, dict(cmd_params))
+        except Exception as e:
+            self._on_ws_error(e)
+
+    async def _run(self):
+        import websockets
+
+        attempt = 0
+        try:
+            while True:
+                was_ready = await self._recv_loop()
+                if self.closing or not self.reconnect:
+                    break
+                attempt = 0 if was_ready else attempt + 1
+                # retry (with backoff) until fresh principles load and a new socket is open
+                while True:
+                    await asyncio.sleep(self._backoff(attempt))
+                    try:
+                        await self._reload_principles()
+                        self.ws = await websockets.connect(self.ws_uri, max_size=None)
+                        break
+                    except Exception as e:
+                        self._on_ws_error(e)
+                        attempt += 1
+                self.reconnects += 1
+                # sequence numbers restart with the new session, and anything sent while down is lost
+                self.last_seq.clear()
+                self._report_gap({"reason": "reconnect", "since": self.last_data_ts})
+                asyncio.ensure_future(self._resume())
+        finally:
+            # consumers waiting in get_async() get an error instead of waiting forever
+            for data_qs in self.data_qs.values():
+                for data_q in data_qs:
+                    data_q.close()
+
+    async def _reload_principles(self):
+        # as TDAStream._reload_principles, refreshing an expired access token first
+        principles = await self.client.principles
+        if "streamerInfo" not in principles and await self.client._refresh_token():
+            principles = await self.client.principles
+        self._load_principles(principles)
+
+    async def _request(self, service, command, params={}, id_=None):
+        req = self._build_cmd(service, command, params, id_)
+        ack = asyncio.get_event_loop().create_future()
+        self.acks[req["requestid"]] = ack
+        await self.ws.send(self.codec.dumps({"requests": [req]}))
+        self._log("SENT", req)
+        resp = await ack
+        if resp.get("content", {}).get("code", 0) != 0:
+            raise TDAAPIError(resp["content"].get("msg", str(resp)))
+        return resp
+
+    def _replay_subs(self):
+        # subscriptions are sent (and acknowledged) individually by AsyncTDASubscription
+        pass
+
+    def _on_resp(self, resp):
+        super()._on_resp(resp)
+        ack = self.acks.pop(resp["requestid"], None)
+        if ack is not None and not ack.done():
+            ack.set_result(resp)
+
+    def subscribe(self, name, queue_size=None, overflow=None, **params):
+        check_assert(self.ws_ready, "Websocket not ready")
+        service, cmd, id_, cmd_params = self._resolve_sub(name, params)
+        data_q = self._make_queue(id_, queue_size, overflow, queue_cls=AsyncTDAStreamQueue)
+        self.subs[id_] = (service, cmd, dict(cmd_params))
+        return AsyncTDASubscription(self, data_q, (service, cmd, cmd_params))
+
+    def live_data(self, queue_size=None, overflow=None):
+        return AsyncTDASubscription(self, self._make_queue("*", queue_size, overflow, queue_cls=AsyncTDAStreamQueue))
+
+    async def logout(self):
+        check_assert(self.ws_ready, "Websocket not ready")
+        return await self._request("admin", "logout")
+
+    async def close(self):
+        self.closing = True
+        if self.recv_task is not None:
+            # the loop may be paused on a full "block" queue nobody reads, which would also stall the close handshake
+            self.recv_task.cancel()
+            await asyncio.gather(self.recv_task, return_exceptions=True)
+        if self.ws is not None:
+            # frames left unread keep websockets from seeing the close reply, so discard them while closing
+            drain = asyncio.ensure_future(self._drain())
+            await self.ws.close()
+            await asyncio.gather(drain, return_exceptions=True)
+
+    async def _drain(self):
+        while True:
+            await self.ws.recv()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
@@ -0,0 +1,78 @@
+from collections import OrderedDict, deque
+import threading
+import queue
+
+from pymeritrade.errors import check_assert
+
+OVERFLOW_POLICIES = ["block", "drop_oldest", "conflate"]
+
+
+class TDAStreamQueue:
+    def __init__(self, maxsize=0, overflow="block"):
+        check_assert(overflow in OVERFLOW_POLICIES, "overflow must be one of " + ", ".join(OVERFLOW_POLICIES))
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.cond = threading.Condition()
+        self.items = deque()
+        self.latest = OrderedDict()
+        self.puts = 0
+        self.drops = 0
+        self.conflated = 0
+        self.max_depth = 0
+
+    def _full(self):
+        return self.maxsize > 0 and len(self) >= self.maxsize
+
+    def _put_conflated(self, name, content, timestamp):
+        for raw_item in content:
+            sym_key = (name, raw_item.get("key"))
+            prev = self.latest.get(sym_key)
+            if prev is not None:
+                # stream items only carry changed fields, so merging keeps the latest full view
+                prev[1].update(raw_item)
+                prev[2] = timestamp
+                self.conflated += 1
+                continue
+            if self._full():
+                self.latest.popitem(last=False)
+                self.drops += 1
+            self.latest[sym_key] = [name, dict(raw_item), timestamp]
+
+    def put(self, item):
+        with self.cond:
+            self.puts += 1
+            if self.overflow == "conflate":
+                self._put_conflated(*item)
+            else:
+                if self._full() and self.overflow == "drop_oldest":
+                    self.items.popleft()
+                    self.drops += 1
+                while self._full():
+                    self.cond.wait()
+                self.items.append(item)
+            self.max_depth = max(self.max_depth, len(self))
+            self.cond.notify_all()
+
+    def get(self, timeout=None):
+        with self.cond:
+            if not self.cond.wait_for(lambda: len(self) > 0, timeout):
+                raise queue.Empty()
+            if self.overflow == "conflate":
+                _, (name, raw_item, timestamp) = self.latest.popitem(last=False)
+                item = (name, [raw_item], timestamp)
+            else:
+                item = self.items.popleft()
+            self.cond.notify_all()
+            return item
+
+    def __len__(self):
+        return len(self.latest) if self.overflow == "conflate" else len(self.items)
+
+    def stats(self):
+        return {
+            "depth": len(self),
+            "max_depth": self.max_depth,
+            "puts": self.puts,
+            "drops": self.drops,
+            "conflated": self.conflated,
+        }
@@ -0,0 +1,166 @@
+import threading
+import struct
+import gzip
+import time
+import os
+
+from pymeritrade.stream.stream import TDAStream
+
+# each frame is stored as <receive time (unix seconds), payload length> followed by the raw payload
+FRAME_HEADER = struct.Struct("<dI")
+FRAME_EXT = ".tdarec.gz"
+
+
+class TDAStreamRecorder:
+    def __init__(self, path="tda-stream", max_bytes=64 * 2**20, max_age=None, compresslevel=6):
+        self.path = os.path.expanduser(path)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.compresslevel = compresslevel
+        self.lock = threading.Lock()
+        self.raw_f = None
+        self.gz_f = None
+        self.opened_at = None
+        self.files = []
+        self.frames = 0
+        self.bytes = 0
+
+    def _open(self, ts):
+        os.makedirs(self.path, exist_ok=True)
+        # named by the first receive time so a sorted listing is in session order
+        fn = os.path.join(self.path, "{:013d}{}".format(int(ts * 1000), FRAME_EXT))
+        while os.path.exists(fn):
+            fn = fn[: -len(FRAME_EXT)] + "_" + FRAME_EXT
+        self.raw_f = open(fn, "wb")
+        self.gz_f = gzip.GzipFile(fileobj=self.raw_f, mode="wb", compresslevel=self.compresslevel)
+        self.opened_at = ts
+        self.files.append(fn)
+
+    def _close_file(self):
+        if self.gz_f is not None:
+            self.gz_f.close()
+            self.raw_f.close()
+            self.gz_f = None
+            self.raw_f = None
+
+    def _should_rotate(self, ts):
+        if self.max_bytes is not None and self.raw_f.tell() >= self.max_bytes:
+            return True
+        return self.max_age is not None and ts - self.opened_at >= self.max_age
+
+    def record(self, msg, ts=None):
+        ts = time.time() if ts is None else ts
+        payload = msg.encode("utf-8") if type(msg) == str else msg
+        with self.lock:
+            if self.gz_f is not None and self._should_rotate(ts):
+                self._close_file()
+            if self.gz_f is None:
+                self._open(ts)
+            self.gz_f.write(FRAME_HEADER.pack(ts, len(payload)) + payload)
+            self.frames += 1
+            self.bytes += len(payload)
+
+    def flush(self):
+        with self.lock:
+            if self.gz_f is not None:
+                self.gz_f.flush()
+
+    def close(self):
+        with self.lock:
+            self._close_file()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _log_files(path):
+    path = os.path.expanduser(path)
+    if os.path.isdir(path):
+        return sorted(os.path.join(path, fn) for fn in os.listdir(path) if fn.endswith(FRAME_EXT))
+    return [path]
+
+
+def read_frames(path):
+    for fn in _log_files(path):
+        with gzip.open(fn, "rb") as gz_f:
+            while True:
+                try:
+                    header = gz_f.read(FRAME_HEADER.size)
+                    if len(header) < FRAME_HEADER.size:
+                        break
+                    ts, size = FRAME_HEADER.unpack(header)
+                    payload = gz_f.read(size)
+                except EOFError:
+                    # a log that was still being written when copied ends mid-frame
+                    break
+                if len(payload) < size:
+                    break
+                yield ts, payload
+
+
+class _NullSocket:
+    def send(self, msg):
+        pass
+
+
+class TDAStreamReplayer:
+    def __init__(self, path, stream=None, **stream_kwargs):
+        self.path = path
+        self.stream = stream if stream is not None else TDAStream(None, reconnect=False, **stream_kwargs)
+        # commands (subscribe, replayed logins) are accepted and dropped so strategy code runs unchanged
+        self.stream.ws = _NullSocket()
+        self.stream.ws_started = True
+        self.stream.ws_ready = True
+        if self.stream.principles is None:
+            self.stream.acc_id = self.stream.app_id = None
+        self.thread = None
+        self.stopping = False
+        self.frames = 0
+        self.bytes = 0
+        self.elapsed = 0.0
+
+    def subscribe(self, name, queue_size=None, overflow=None, **params):
+        return self.stream.subscribe(name, queue_size=queue_size, overflow=overflow, **params)
+
+    def live_data(self, queue_size=None, overflow=None):
+        return self.stream.live_data(queue_size=queue_size, overflow=overflow)
+
+    def run(self, speed=None):
+        start = time.perf_counter()
+        first_ts = None
+        for ts, payload in read_frames(self.path):
+            if self.stopping:
+                break
+            if speed is not None:
+                # speed=1 replays at wall-clock pace, speed=10 ten times faster
+                first_ts = ts if first_ts is None else first_ts
+                delay = (ts - first_ts) / speed - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            self.stream._on_ws_msg(payload)
+            self.frames += 1
+            self.bytes += len(payload)
+        self.elapsed = time.perf_counter() - start
+        return self.stats()
+
+    def start(self, speed=None):
+        self.stopping = False
+        self.thread = threading.Thread(target=self.run, args=(speed,), daemon=True)
+        self.thread.start()
+        return self.thread
+
+    def stop(self):
+        self.stopping = True
+
+    def stats(self):
+        elapsed = self.elapsed or float("nan")
+        return {
+            "frames": self.frames,
+            "bytes": self.bytes,
+            "elapsed": self.elapsed,
+            "frames_per_sec": self.frames / elapsed,
+            "mb_per_sec": self.bytes / elapsed / 1e6,
+        }
@@ -78,3 +78,7 @@ SUB_TYPES = {
     ),
 }
 SUB_ID_TO_NAME = {val[2]: key for key, val in SUB_TYPES.items()}
+# index key ("0", "1", ...) -> clean field name, precomputed once per subscription type
+FIELD_MAPS = {key: {str(i): name for i, name in enumerate(val[3])} for key, val in SUB_TYPES.items()}
+# clean field name -> index key, for decoding single fields on access
+FIELD_INDEX = {key: {name: idx_key for idx_key, name in fields.items()} for key, fields in FIELD_MAPS.items()}
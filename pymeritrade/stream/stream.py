@@ -1,84 +1,192 @@
 from urllib.parse import urlencode
-from collections import defaultdict
+from collections import defaultdict, deque
+from collections.abc import Mapping
 from datetime import datetime
 import threading
-import websocket
-import queue
+import random
 import time
-import json
 
-from pymeritrade.errors import TDAPermissionsError, check_assert
-from pymeritrade.stream.schemas import SUB_ID_TO_NAME, SUB_TYPES
+from pymeritrade.errors import TDAAPIError, TDAPermissionsError, check_assert
+from pymeritrade.codec import get_codec
+from pymeritrade.stream.schemas import FIELD_INDEX, FIELD_MAPS, SUB_ID_TO_NAME, SUB_TYPES
+from pymeritrade.stream.queues import TDAStreamQueue
+from pymeritrade.utils import _typed_column, lazy_import, np, pd
+
+websocket = lazy_import("websocket")
+
+
+class StreamItem(Mapping):
+    # one symbol's update, read like a dict of field name -> value; fields are decoded when accessed
+    __slots__ = ("key", "_raw", "_fields", "_index")
+
+    def __init__(self, raw_item, fields, index):
+        self.key = raw_item["key"]
+        self._raw = raw_item
+        self._fields = fields
+        self._index = index
+
+    def __getitem__(self, name):
+        if name == "seq":
+            return self._raw.get("seq")
+        idx_key = self._index[name]
+        if idx_key not in self._raw:
+            raise KeyError(name)
+        return self._raw[idx_key]
+
+    def __iter__(self):
+        yield "seq"
+        for idx_key in self._raw:
+            if idx_key in self._fields:
+                yield self._fields[idx_key]
+
+    def __len__(self):
+        return 1 + sum(1 for idx_key in self._raw if idx_key in self._fields)
+
+    def __repr__(self):
+        return repr(dict(self))
 
 
 class StreamData:
-    def __init__(self, type_name, data):
+
+    __slots__ = ("name", "raw", "meta", "timestamp", "_fields", "_index", "_data")
+
+    def __init__(self, type_name, data, timestamp=None):
         self.name = type_name
         self.raw = data
         self.meta = SUB_TYPES[type_name]
-        self.data = {}
-        for raw_item in self.raw:
-            key = raw_item["key"]
-            item_dict = {"seq": raw_item.get("seq")}
-            for i, clean_name in enumerate(self.meta[3]):
-                idx_key = str(i)
-                if idx_key in raw_item:
-                    item_dict[clean_name] = raw_item[idx_key]
-            self.data[key] = item_dict
+        self.timestamp = timestamp
+        self._fields = FIELD_MAPS[type_name]
+        self._index = FIELD_INDEX[type_name]
+        self._data = None
+
+    @property
+    def data(self):
+        # items only wrap the raw dicts, a field is decoded when a consumer reads it
+        if self._data is None:
+            fields, index = self._fields, self._index
+            self._data = {raw_item["key"]: StreamItem(raw_item, fields, index) for raw_item in self.raw}
+        return self._data
+
+    @property
+    def keys(self):
+        return [raw_item["key"] for raw_item in self.raw]
+
+    def columns(self, fields=None):
+        # the whole message as {field: array}, one array per field rather than a record per symbol
+        fields = fields if fields is not None else self.meta[3]
+        cols = {"key": _stream_column(self.keys), "seq": _stream_column([raw_item.get("seq") for raw_item in self.raw])}
+        for name in fields:
+            idx_key = self._index[name]
+            cols[name] = _stream_column([raw_item.get(idx_key) for raw_item in self.raw])
+        return cols
+
+    def to_frame(self, fields=None):
+        return pd.DataFrame(self.columns(fields)).set_index("key")
 
     def __getitem__(self, key):
         return self.data[key]
 
     def __repr__(self):
-        return f"<StreamData ({self.name}) [{','.join(self.data)}]>"
+        return f"<StreamData ({self.name}) [{','.join(self.keys)}]>"
+
+
+def _stream_column(values):
+    # updates only carry changed fields, so the first value may be missing (None)
+    sample = next((val for val in values if val is not None), None)
+    col = _typed_column(values, sample)
+    return col if isinstance(col, np.ndarray) else np.asarray(col, dtype=object)
 
 
 class TDAStream:
-    def __init__(self, client, debug=False):
-        self.principles = client.principles
-        self.ws_uri = "wss://" + self.principles["streamerInfo"]["streamerSocketUrl"] + "/ws"
-        self.token_ts = _iso_to_ms(self.principles["streamerInfo"]["tokenTimestamp"])
-        self.acc_id = self.principles["accounts"][0]["accountId"]
-        self.app_id = self.principles["streamerInfo"]["appId"]
+    def __init__(
+        self,
+        client,
+        debug=False,
+        queue_size=10000,
+        overflow="drop_oldest",
+        reconnect=True,
+        max_backoff=60,
+        on_gap=None,
+        codec=None,
+        recorder=None,
+        metrics=None,
+    ):
+        self.client = client
+        self.codec = get_codec(codec if codec is not None else getattr(client, "codec", None))
+        self.principles = None
+        if client is not None:
+            self._load_principles(client.principles)
         self.debug = debug
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.reconnect = reconnect
+        self.max_backoff = max_backoff
+        self.on_gap = on_gap
+        self.recorder = recorder
+        self.metrics = metrics if metrics is not None else getattr(client, "metrics", None)
 
         self.cmd_buffer = []
         self.req_id_cnt = 0
         self.ws = None
+        self.ws_app = None
         self.ws_started = False
         self.ws_ready = False
+        self.ready = threading.Event()
+        self.closing = False
+        self.stopped = threading.Event()
         self.thread = None
-        self.data_qs = defaultdict(lambda: None)
+        self.data_qs = defaultdict(list)
+        self.sub_names = dict(SUB_ID_TO_NAME)
+        self.subs = {}
+        self.reconnects = 0
+        self.last_seq = {}
+        self.gaps = deque(maxlen=1000)
+        self.last_heartbeat = None
+        self.heartbeat_latency = None
+        self.last_data_ts = None
+
+    def _load_principles(self, principles):
+        if "streamerInfo" not in principles:
+            raise TDAAPIError(principles.get("error", "Unable to load streamer info"))
+        self.principles = principles
+        socket_url = self.principles["streamerInfo"]["streamerSocketUrl"]
+        # a full url (e.g. a local ws:// stand-in) is used as given
+        self.ws_uri = socket_url if "://" in socket_url else "wss://" + socket_url + "/ws"
+        self.token_ts = _iso_to_ms(self.principles["streamerInfo"]["tokenTimestamp"])
+        self.acc_id = self.principles["accounts"][0]["accountId"]
+        self.app_id = self.principles["streamerInfo"]["appId"]
 
     def _log(self, *args):
         if self.debug:
             print(*args)
 
-    def _cmd(self, service, command, params={}, id_=None, send=True):
+    def _build_cmd(self, service, command, params={}, id_=None):
         if id_ is None:
             self.req_id_cnt += 1
             id_ = self.req_id_cnt
         for key, val in params.items():
             if type(val) == list:
                 params[key] = ",".join([str(v) for v in val])
-        self.cmd_buffer.append(
-            {
-                "service": service.upper(),
-                "command": command.upper(),
-                "requestid": str(id_),
-                "account": self.acc_id,
-                "source": self.app_id,
-                "parameters": params,
-            }
-        )
+        return {
+            "service": service.upper(),
+            "command": command.upper(),
+            "requestid": str(id_),
+            "account": self.acc_id,
+            "source": self.app_id,
+            "parameters": params,
+        }
+
+    def _cmd(self, service, command, params={}, id_=None, send=True):
+        req = self._build_cmd(service, command, params, id_)
+        self.cmd_buffer.append(req)
         if send:
             reqs = {"requests": self.cmd_buffer}
-            self.ws.send(json.dumps(reqs))
+            self.ws.send(self.codec.dumps(reqs))
             self.cmd_buffer = []
             self._log("SENT", reqs)
-        return id_
+        return req["requestid"]
 
-    def _on_ws_open(self, ws):
+    def _login_params(self):
         creds = {
             "userid": self.acc_id,
             "token": self.principles["streamerInfo"]["token"],
@@ -97,11 +205,21 @@ class TDAStream:
             "token": self.principles["streamerInfo"]["token"],
             "version": "1.0",
         }
+        return login_params
+
+    def _on_ws_open(self, ws):
         self.ws = ws
-        self._cmd("admin", "login", login_params, id_="login")
+        self._cmd("admin", "login", self._login_params(), id_="login")
 
     def _on_ws_msg(self, msg):
-        msg_json = json.loads(msg)
+        if self.recorder is not None:
+            self.recorder.record(msg)
+        if self.metrics is not None:
+            start = time.perf_counter()
+            msg_json = self.codec.loads(msg)
+            self.metrics.record_frame(len(msg), time.perf_counter() - start)
+        else:
+            msg_json = self.codec.loads(msg)
         for resp in msg_json.get("response", []):
             self._on_resp(resp)
         for note in msg_json.get("notify", []):
@@ -119,38 +237,110 @@ class TDAStream:
         self._log("RESP", resp)
         if resp["requestid"] == "login":
             self.ws_ready = True
+            self._replay_subs()
+            self.ready.set()
+
+    def _replay_subs(self):
+        subs = list(self.subs.values())
+        for i, (service, cmd, cmd_params) in enumerate(subs):
+            self._cmd(service, cmd, dict(cmd_params), send=i == len(subs) - 1)
 
     def _on_notify(self, info):
         self._log("NOTIFY", info)
+        if "heartbeat" in info:
+            self.last_heartbeat = time.time()
+            self.heartbeat_latency = self.last_heartbeat - int(info["heartbeat"]) / 1000
+
+    def _report_gap(self, gap):
+        self._log("GAP", gap)
+        self.gaps.append(gap)
+        if self.on_gap is not None:
+            self.on_gap(gap)
+
+    def _check_seq(self, key, content):
+        for raw_item in content:
+            seq = raw_item.get("seq")
+            if seq is None:
+                continue
+            seq_key = (key, raw_item.get("key"))
+            last = self.last_seq.get(seq_key)
+            if last is not None and seq > last + 1:
+                self._report_gap(
+                    {"reason": "seq", "service": key, "key": seq_key[1], "expected": last + 1, "received": seq}
+                )
+            self.last_seq[seq_key] = seq
 
     def _on_data(self, data):
         key = _msg_to_key(data)
-        name = SUB_ID_TO_NAME[key]
+        name = self.sub_names[key]
         self._log("DATA", key, data)
+        self.last_data_ts = data.get("timestamp")
+        self._check_seq(key, data["content"])
+        if self.metrics is not None:
+            self.metrics.record_stream(key, len(data["content"]), data.get("timestamp"))
+        item = (name, data["content"], data.get("timestamp"))
+        for data_q in self.data_qs[key] + self.data_qs["*"]:
+            data_q.put(item)
 
-        def _append_data(q):
-            if q is not None:
-                q.put((name, data["content"]))
+    def _run(self):
+        attempt = 0
+        while True:
+            ws = websocket.WebSocketApp(
+                self.ws_uri,
+                on_message=lambda ws, msg: self._on_ws_msg(msg),
+                on_error=lambda ws, err: self._on_ws_error(err),
+                on_close=lambda ws, *args: self._on_ws_close(),
+                on_open=lambda ws: self._on_ws_open(ws),
+            )
+            self.ws_app = ws
+            ws.run_forever()
+            was_ready = self.ws_ready
+            self.ws_ready = False
+            self.ready.clear()
+            if self.closing or not self.reconnect:
+                break
+            attempt = 0 if was_ready else attempt + 1
+            # retry (with backoff) until fresh principles load, so no socket is opened with a stale streamer token;
+            # close() during the backoff ends the loop instead of opening a socket nobody will close
+            while not self.stopped.wait(self._backoff(attempt)):
+                try:
+                    self._reload_principles()
+                    break
+                except Exception as e:
+                    self._on_ws_error(e)
+                    attempt += 1
+            if self.closing:
+                break
+            self.reconnects += 1
+            # sequence numbers restart with the new session, and anything sent while down is lost
+            self.last_seq.clear()
+            self._report_gap({"reason": "reconnect", "since": self.last_data_ts})
 
-        _append_data(self.data_qs[key])
-        _append_data(self.data_qs["*"])
+    def _backoff(self, attempt):
+        return min(self.max_backoff, 2**attempt) * random.uniform(0.5, 1)
 
-    def start(self):
-        ws = websocket.WebSocketApp(
-            self.ws_uri,
-            on_message=lambda ws, msg: self._on_ws_msg(msg),
-            on_error=lambda err: self._on_ws_error(err),
-            on_close=lambda ws: self._on_ws_close(),
-            on_open=lambda ws: self._on_ws_open(ws),
-        )
+    def _reload_principles(self):
+        # the streamer token in the old principles may have expired, and after 30 minutes so has the access token
+        principles = self.client.principles
+        if "streamerInfo" not in principles and self.client._refresh_token():
+            principles = self.client.principles
+        self._load_principles(principles)
+
+    def start(self, timeout=None):
         self.ws_started = True
-        self.thread = threading.Thread(target=ws.run_forever)
+        self.closing = False
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self._run, daemon=True)
         self.thread.start()
-        while not self.ws_ready:
-            time.sleep(0.1)
+        check_assert(self.ready.wait(timeout), "Websocket login timed out")
 
-    def subscribe(self, name, **params):
-        check_assert(self.ws_ready, "Websocket not ready")
+    def close(self):
+        self.closing = True
+        self.stopped.set()
+        if self.ws_app is not None:
+            self.ws_app.close()
+
+    def _resolve_sub(self, name, params):
         check_assert(name in SUB_TYPES)
         check_assert(len(params["symbols"]) > 0, "At least one symbol needed.")
         service, cmd, id_, output_names, default_fields, mods = SUB_TYPES[name]
@@ -159,25 +349,42 @@ class TDAStream:
             check_assert(selected is not None, mod + " not provided")
             service = service.replace(mod, selected)
             id_ = id_.replace(mod, selected)
-        self._cmd(service, cmd, {"keys": params.get("symbols", ""), "fields": params.get("fields", default_fields)})
-        return self._make_queue_iter("news", id_)
+        # modded services (e.g. CHART_EQUITY) arrive under their resolved id
+        self.sub_names[id_] = name
+        return service, cmd, id_, {"keys": params.get("symbols", ""), "fields": params.get("fields", default_fields)}
 
-    def live_data(self):
-        return self._make_queue_iter("*", "*")()
+    def subscribe(self, name, queue_size=None, overflow=None, **params):
+        check_assert(self.ws_ready, "Websocket not ready")
+        service, cmd, id_, cmd_params = self._resolve_sub(name, params)
+        data_iter = self._make_queue_iter(id_, queue_size, overflow)
+        self.subs[id_] = (service, cmd, dict(cmd_params))
+        self._cmd(service, cmd, cmd_params)
+        return data_iter
 
-    def _make_queue_iter(self, clean_name, name):
-        data_q = self.data_qs[name]
-        if data_q is None:
-            data_q = queue.Queue()
-            self.data_qs[name] = data_q
+    def live_data(self, queue_size=None, overflow=None):
+        return self._make_queue_iter("*", queue_size, overflow)()
+
+    def _make_queue(self, name, queue_size=None, overflow=None, queue_cls=TDAStreamQueue):
+        data_q = queue_cls(
+            maxsize=queue_size if queue_size is not None else self.queue_size,
+            overflow=overflow if overflow is not None else self.overflow,
+        )
+        self.data_qs[name].append(data_q)
+        return data_q
+
+    def _make_queue_iter(self, name, queue_size=None, overflow=None):
+        data_q = self._make_queue(name, queue_size, overflow)
 
         def data_iter():
             while True:
-                type_name, items = data_q.get(block=True)
-                yield StreamData(type_name, items)
+                type_name, items, timestamp = data_q.get()
+                yield StreamData(type_name, items, timestamp)
 
         return data_iter
 
+    def queue_stats(self):
+        return {name: [data_q.stats() for data_q in data_qs] for name, data_qs in self.data_qs.items()}
+
     def logout(self):
         check_assert(self.ws_ready, "Websocket not ready")
         self._cmd("admin", "logout")
@@ -190,4 +397,3 @@ def _iso_to_ms(iso_date):
 
 def _msg_to_key(msg):
     return "{}-{}".format(msg["service"], msg["command"])
-
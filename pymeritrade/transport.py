@@ -0,0 +1,65 @@
+from requests.adapters import HTTPAdapter
+import requests
+import random
+import time
+
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+class TDATransport:
+    def __init__(
+        self,
+        pool_size=10,
+        pool_connections=4,
+        timeout=(5, 30),
+        retries=3,
+        backoff=0.5,
+        max_backoff=10,
+        retry_statuses=RETRY_STATUSES,
+        keep_alive=True,
+    ):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_statuses = set(retry_statuses)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(
+            {"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive" if keep_alive else "close"}
+        )
+
+    def _sleep_time(self, attempt, resp):
+        retry_after = resp.headers.get("Retry-After") if resp is not None else None
+        if retry_after is not None:
+            try:
+                return min(float(retry_after), self.max_backoff)
+            except ValueError:
+                pass
+        delay = min(self.backoff * (2 ** attempt), self.max_backoff)
+        return delay * (0.5 + random.random() / 2)
+
+    def request(self, method, url, **kwargs):
+        method = method.upper()
+        kwargs.setdefault("timeout", self.timeout)
+        # non-idempotent requests (orders, oauth) are only retried when the server rejected them outright
+        retry_statuses = self.retry_statuses if method in IDEMPOTENT_METHODS else {429}
+        attempt = 0
+        while True:
+            resp = None
+            try:
+                resp = self.session.request(method, url, **kwargs)
+                if resp.status_code not in retry_statuses or attempt >= self.retries:
+                    return resp
+            except (requests.ConnectionError, requests.Timeout):
+                if method not in IDEMPOTENT_METHODS or attempt >= self.retries:
+                    raise
+            time.sleep(self._sleep_time(attempt, resp))
+            attempt += 1
+
+    def close(self):
+        self.session.close()
@@ -1,9 +1,43 @@
-import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from operator import itemgetter
+import importlib
+import types
 import re
 
+from pymeritrade.errors import TDAUsageError
 
-def parse_date_cols(df, cols):
-    df = df.copy()
+PANDAS_HINT = "pandas is required for DataFrame results (pip install pymeritrade[pandas])"
+
+
+class _LazyModule(types.ModuleType):
+    def __init__(self, name, hint=None):
+        super().__init__(name)
+        self._lazy_hint = hint
+
+    def __getattr__(self, attr):
+        try:
+            module = importlib.import_module(self.__name__)
+        except ImportError:
+            if self._lazy_hint is None:
+                raise
+            raise TDAUsageError(self._lazy_hint)
+        # later lookups hit the proxy's own __dict__ and skip this hook
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+
+def lazy_import(name, hint=None):
+    return _LazyModule(name, hint)
+
+
+pd = lazy_import("pandas", PANDAS_HINT)
+np = lazy_import("numpy", PANDAS_HINT)
+
+
+def parse_date_cols(df, cols, copy=True):
+    if copy:
+        df = df.copy()
     for date_key in cols:
         df[date_key] = pd.to_datetime(df[date_key] * 1000 * 1000)
     return df
@@ -14,6 +48,64 @@ def camel_to_snake(name):
     return re.sub("([a-z0-9])([A-Z])", r"\1_\2", name).lower()
 
 
+@lru_cache(maxsize=1024)
+def clean_col_name(col):
+    return camel_to_snake(col.replace("InLong", ""))
+
+
 def clean_col_names(df):
-    col_map = {col: camel_to_snake(col.replace("InLong", "")) for col in df.columns}
+    col_map = {col: clean_col_name(col) for col in df.columns}
     return df.rename(columns=col_map)
+
+
+def _typed_column(values, sample):
+    if type(sample) not in (int, float, bool):
+        return list(values)
+    try:
+        arr = np.array(values, dtype="float64") if type(sample) == float else np.array(values)
+        # a stray string (e.g. "NaN" among ints) would otherwise turn the whole column into strings
+        if arr.dtype.kind in "iubf":
+            return arr
+    except (TypeError, ValueError):
+        pass
+    if type(sample) == bool:
+        return list(values)
+    return pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").values
+
+
+def records_to_frame(records, fields, col_names=None):
+    if len(fields) > 1:
+        try:
+            # itemgetter + zip transposes the records in C without a per-field Python loop
+            columns = list(zip(*map(itemgetter(*fields), records)))
+        except KeyError:
+            columns = [[record.get(field) for record in records] for field in fields]
+    else:
+        columns = [[record.get(field) for record in records] for field in fields]
+    col_names = col_names if col_names is not None else fields
+    if len(records) == 0:
+        return pd.DataFrame({name: [] for name in col_names})
+    data = {name: _typed_column(col, records[0].get(field)) for name, field, col in zip(col_names, fields, columns)}
+    return pd.DataFrame(data, copy=False)
+
+
+def run_parallel(func, items, max_workers=8):
+    items = list(items)
+    if max_workers is None or max_workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+        return list(pool.map(func, items))
+
+
+def batch_symbols(symbols, max_count=300, max_chars=2000):
+    batches = []
+    batch, batch_len = [], 0
+    for symbol in symbols:
+        if len(batch) > 0 and (len(batch) >= max_count or batch_len + len(symbol) + 1 > max_chars):
+            batches.append(batch)
+            batch, batch_len = [], 0
+        batch.append(symbol)
+        batch_len += len(symbol) + 1
+    if len(batch) > 0:
+        batches.append(batch)
+    return batches
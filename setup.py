@@ -20,6 +20,13 @@ setuptools.setup(
     url="https://github.com/sshh12/pymeritrade",
     packages=setuptools.find_packages(),
     install_requires=required,
+    extras_require={
+        "async": ["aiohttp>=3.6", "websockets>=8.1"],
+        "store": ["pyarrow"],
+        "fast": ["orjson"],
+        "pandas": ["pandas", "numpy"],
+        "selenium": ["selenium==3.141.0"],
+    },
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",